@@ -1,13 +1,184 @@
 """Common functionality for mediathekviewweb API."""
 
+import atexit
+import codecs
+import glob
+import hashlib
+import itertools
+import json
+import lzma
+import mmap
+import os
+import sqlite3
+import struct
 import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+from urllib.parse import urlparse
 
 import requests
 
+try:
+    import yt_dlp
+except ImportError:  # Optional, only needed for the in-process yt-dlp mode
+    yt_dlp = None
+
 
 MEDIATHEKVIEWWEB_API = "https://mediathekviewweb.de/api/query"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mediathek"
+DURATION_CACHE_FILE = CACHE_DIR / "durations.json"
+DURATION_FAILURE_TTL = 3600  # Failed probes are retried after this many seconds
+FILMLIST_URL = "https://liste.mediathekview.de/Filmliste-akt.xz"
+FILMLIST_DIFF_URL = "https://liste.mediathekview.de/Filmliste-diff.xz"
+FILMLIST_DB = CACHE_DIR / "filmliste.db"
+FILMLIST_MAX_AGE = 2 * 24 * 3600  # Older local film lists fall back to the remote API
+# URLs with these extensions are plain files that don't need a yt-dlp extractor
+DIRECT_VIDEO_EXTENSIONS = (".mp4", ".webm", ".mov", ".m4v")
+DOWNLOAD_CONNECTIONS = 4
+DOWNLOAD_SEGMENT_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_PER_HOST = int(os.environ.get("MEDIATHEK_PER_HOST") or 6)  # Concurrent video connections per host
+DOWNLOAD_RETRIES = 3  # Rounds of retrying failed segments before a direct download gives up
+QUALITY_ORDER = ("hd", "normal", "low")
+# Download policy for maus.py and tatort.py, e.g. MEDIATHEK_QUALITIES=normal,low MEDIATHEK_MAX_SIZE_MB=800
+DOWNLOAD_QUALITIES = tuple(q for q in os.environ.get("MEDIATHEK_QUALITIES", "").replace(" ", "").split(",") if q)
+DOWNLOAD_QUALITIES = DOWNLOAD_QUALITIES or QUALITY_ORDER
+DOWNLOAD_MAX_SIZE = int(os.environ.get("MEDIATHEK_MAX_SIZE_MB") or 0) * 1024 * 1024 or None
+PROBE_BYTES = 256 * 1024
+# "inprocess" runs yt-dlp through one shared yt_dlp.YoutubeDL instead of one process per call
+YTDLP_MODE = os.environ.get("MEDIATHEK_YTDLP", "subprocess")
+YTDLP_WORKERS = 4
+TRACE_FILE = os.environ.get("MEDIATHEK_TRACE")  # JSON Lines trace of timed stages, off if unset
+
+
+class Tracer:
+    """Timing spans and byte counts for the stages of a run.
+
+    Every finished span is appended to a JSON Lines trace, and summary() condenses
+    them into p50/p95 per stage and MB/s per host. Spans that report "bytes"
+    count towards the transfer rate of their host. Disabled, a span only costs
+    the context manager.
+    """
+
+    def __init__(self):
+        self.path: Path | None = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._durations: dict[str, list[float]] = {}
+        self._host_bytes: dict[str, int] = {}
+        self._host_seconds: dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    @contextmanager
+    def span(self, stage: str, **fields):
+        """Time the block as one span of stage. The block may add fields, like bytes, to the yielded dict."""
+        if not self.enabled:
+            yield fields
+            return
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self._record(stage, start, time.perf_counter() - started, fields)
+
+    def _record(self, stage: str, start: float, duration: float, fields: dict):
+        line = json.dumps({"stage": stage, "start": round(start, 3), "duration": round(duration, 4), **fields}, default=str)
+        with self._lock:
+            self._durations.setdefault(stage, []).append(duration)
+            if fields.get("bytes") and fields.get("host"):
+                host = fields["host"]
+                self._host_bytes[host] = self._host_bytes.get(host, 0) + fields["bytes"]
+                self._host_seconds[host] = self._host_seconds.get(host, 0) + duration
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    @staticmethod
+    def _percentile(values: list[float], fraction: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> list[str]:
+        """Return the summary as lines of text (empty if tracing is off)."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            lines = [f"{'Schritt':<12} {'Anzahl':>7} {'Summe s':>9} {'p50 s':>8} {'p95 s':>8}"]
+            for stage, durations in sorted(self._durations.items()):
+                lines.append(
+                    f"{stage:<12} {len(durations):>7} {sum(durations):>9.1f} "
+                    f"{self._percentile(durations, 0.5):>8.2f} {self._percentile(durations, 0.95):>8.2f}"
+                )
+            if self._host_bytes:
+                # Per transfer: concurrent transfers to one host each count with their own time
+                lines.append("")
+                lines.append(f"{'Host':<36} {'MB':>9} {'MB/s':>8}")
+                for host, count in sorted(self._host_bytes.items()):
+                    seconds = self._host_seconds[host]
+                    rate = count / seconds / 1024**2 if seconds else 0
+                    lines.append(f"{host:<36} {count / 1024**2:>9.1f} {rate:>8.2f}")
+        return lines
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+TRACER = Tracer()
+if TRACE_FILE:
+    TRACER.start(TRACE_FILE)
+
+
+def url_host(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+class HostLimiter:
+    """Caps the number of concurrent connections per host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    def set_limit(self, per_host: int):
+        """Change the cap; only call this while no slot is held."""
+        with self._lock:
+            self.per_host = max(1, per_host)
+            self._semaphores.clear()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = url_host(url)
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        with semaphore:
+            yield
+
+
+# Video transfers, shared by all parallel downloads (direct range segments and yt-dlp)
+VIDEO_LIMITER = HostLimiter(DOWNLOAD_PER_HOST)
 
 
 @dataclass
@@ -22,6 +193,7 @@ class MediathekResult:
     url_video: str
     url_video_hd: str
     url_video_low: str
+    id: str = ""  # mediathekviewweb's id, or the film list id for local results
 
     @classmethod
     def from_api(cls, data: dict) -> "MediathekResult":
@@ -35,12 +207,28 @@ class MediathekResult:
             url_video=data.get("url_video", ""),
             url_video_hd=data.get("url_video_hd", ""),
             url_video_low=data.get("url_video_low", ""),
+            id=data.get("id", ""),
         )
 
     def get_best_url(self) -> str:
         """Return the best available video URL (HD > normal > low)."""
         return self.url_video_hd or self.url_video or self.url_video_low
 
+    def get_variants(self) -> dict[str, str]:
+        """Return the available video URLs by quality."""
+        urls = {"hd": self.url_video_hd, "normal": self.url_video, "low": self.url_video_low}
+        return {quality: url for quality, url in urls.items() if url}
+
+
+@dataclass
+class VariantProbe:
+    """Availability of one video variant, from a small ranged GET request."""
+    quality: str
+    url: str
+    live: bool
+    size: int | None = None  # in bytes, if the server told us
+    throughput: float | None = None  # in bytes per second, for the probe request
+
 
 @dataclass
 class DownloadResult:
@@ -49,15 +237,35 @@ class DownloadResult:
     path: Path | None = None
     duration_seconds: float | None = None
     error: str | None = None
+    variant: str | None = None  # Quality of the downloaded variant ("hd", "normal", "low")
 
     @property
     def duration_formatted(self) -> str:
         """Return duration as MM:SS string."""
-        if self.duration_seconds is None:
-            return ""
-        minutes = int(self.duration_seconds // 60)
-        secs = int(self.duration_seconds % 60)
-        return f"{minutes}:{secs:02d}"
+        return format_duration(self.duration_seconds)
+
+
+def format_duration(seconds: float | None) -> str:
+    """Format seconds as MM:SS string."""
+    if seconds is None:
+        return ""
+    minutes = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{minutes}:{secs:02d}"
+
+
+def parse_duration(text: str) -> float | None:
+    """Parse an MM:SS or H:MM:SS string into seconds."""
+    try:
+        parts = [int(part) for part in text.split(":")]
+    except (AttributeError, ValueError):
+        return None
+    if not 2 <= len(parts) <= 3:
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return float(seconds)
 
 
 def search_mediathekviewweb(
@@ -70,6 +278,9 @@ def search_mediathekviewweb(
 ) -> list[MediathekResult]:
     """Search mediathekviewweb for videos.
 
+    Queries are answered from the local film list mirror if it is fresh (see
+    FilmList), otherwise by the mediathekviewweb API.
+
     Args:
         topic: The show/topic to search for (e.g., "Die Maus", "tatort")
         title: Optional title to search for within the topic
@@ -82,6 +293,106 @@ def search_mediathekviewweb(
     Returns:
         List of MediathekResult objects
     """
+    mediathek_results = search_page(topic, title, min_duration, max_results, offset)
+    return filter_blocklist(mediathek_results, blocklist)
+
+
+def iter_mediathekviewweb(
+    topic: str,
+    title: str | None = None,
+    min_duration: int | None = None,
+    min_timestamp: int | None = None,
+    page_size: int = 50,
+    offset: int = 0,
+    blocklist: list[str] | None = None,
+    on_page: Callable[[int, int], None] | None = None,
+) -> Iterator[MediathekResult]:
+    """Yield search results across all pages, newest first.
+
+    The next page is fetched in the background while the caller works on the
+    current one. Results that were already yielded on an earlier page (by id)
+    are skipped, and iteration stops at the first result older than min_timestamp.
+
+    Args:
+        topic, title, min_duration, offset, blocklist: as for search_mediathekviewweb
+        min_timestamp: Stop once results are older than this Unix timestamp
+        page_size: Number of results to request per page
+        on_page: Called with (offset, number of results) whenever a new page is started
+    """
+    seen_ids = set()
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(search_page, topic, title, min_duration, page_size, offset)
+        while future is not None:
+            page = future.result()
+            if on_page:
+                on_page(offset, len(page))
+            future = None
+            if len(page) == page_size:
+                future = executor.submit(search_page, topic, title, min_duration, page_size, offset + page_size)
+            for result in filter_blocklist(page, blocklist):
+                if min_timestamp is not None and result.timestamp < min_timestamp:
+                    return
+                if result.id:
+                    if result.id in seen_ids:
+                        continue
+                    seen_ids.add(result.id)
+                yield result
+            offset += page_size
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def filter_blocklist(results: list[MediathekResult], blocklist: list[str] | None) -> list[MediathekResult]:
+    """Drop results whose titles contain any of the blocklist strings (case-insensitive)."""
+    if not blocklist:
+        return results
+    blocklist_lower = [b.lower() for b in blocklist]
+    return [
+        r for r in results
+        if not any(b in r.title.lower() for b in blocklist_lower)
+    ]
+
+
+def search_page(
+    topic: str,
+    title: str | None = None,
+    min_duration: int | None = None,
+    max_results: int = 10,
+    offset: int = 0,
+) -> list[MediathekResult]:
+    """Get one page of results from the local film list if it is fresh, or from the API."""
+    film_list = get_film_list()
+    if film_list.is_fresh():
+        try:
+            with TRACER.span("search", host="filmliste"):
+                return film_list.search(
+                    topic, title=title, min_duration=min_duration, max_results=max_results, offset=offset
+                )
+        except sqlite3.Error:
+            pass
+    return search_remote(topic, title, min_duration, max_results, offset)
+
+
+_session: requests.Session | None = None
+
+
+def get_session() -> requests.Session:
+    """Shared session, so API requests reuse pooled connections."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def search_remote(
+    topic: str,
+    title: str | None = None,
+    min_duration: int | None = None,
+    max_results: int = 10,
+    offset: int = 0,
+) -> list[MediathekResult]:
+    """Query the mediathekviewweb API."""
     queries = [{"fields": ["topic"], "query": topic}]
     if title:
         queries.append({"fields": ["title"], "query": title})
@@ -98,28 +409,513 @@ def search_mediathekviewweb(
         query["duration_min"] = min_duration
 
     headers = {"Content-Type": "text/plain"}
-    response = requests.post(MEDIATHEKVIEWWEB_API, json=query, headers=headers)
-    response.raise_for_status()
+    with TRACER.span("search", host=url_host(MEDIATHEKVIEWWEB_API)):
+        response = get_session().post(MEDIATHEKVIEWWEB_API, json=query, headers=headers, timeout=30)
+        response.raise_for_status()
 
     data = response.json()
     if data.get("err"):
         raise ValueError(f"API error: {data}")
 
     results = data.get("result", {}).get("results", [])
-    mediathek_results = [MediathekResult.from_api(r) for r in results]
-
-    # Filter by blocklist
-    if blocklist:
-        blocklist_lower = [b.lower() for b in blocklist]
-        mediathek_results = [
-            r for r in mediathek_results
-            if not any(b in r.title.lower() for b in blocklist_lower)
+    return [MediathekResult.from_api(r) for r in results]
+
+
+FILMLIST_FIELDS = (
+    "channel", "topic", "title", "date", "time", "duration", "size_mb", "description",
+    "url_video", "website", "url_subtitle", "url_rtmp", "url_video_low", "url_rtmp_low",
+    "url_video_hd", "url_rtmp_hd", "timestamp", "url_history", "geo", "new",
+)
+
+
+def _expand_filmlist_url(base_url: str, value: str) -> str:
+    """Film list URL variants are stored as "<prefix length>|<suffix>" relative to url_video."""
+    if not value:
+        return ""
+    prefix, sep, suffix = value.partition("|")
+    if not sep or not prefix.isdigit():
+        return value
+    return base_url[:int(prefix)] + suffix
+
+
+def _parse_filmlist_duration(value: str) -> int:
+    try:
+        hours, minutes, seconds = (int(part) for part in value.split(":"))
+    except ValueError:
+        return 0
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def iter_filmlist_entries(chunks: Iterator[bytes]) -> Iterator[dict]:
+    """Parse an xz-compressed MediathekView film list, yielding one dict per film.
+
+    The film list is a JSON object with one "X" key per film, which json.loads
+    can't handle, so each entry is decoded from a rolling buffer as it arrives.
+    Empty channel and topic fields repeat the previous entry's values.
+    """
+    decompressor = lzma.LZMADecompressor()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    json_decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0  # Read cursor, the buffer is only trimmed when the next chunk is appended
+    channel = topic = ""
+    chunks = iter(chunks)
+    exhausted = False
+
+    while True:
+        start = buffer.find('"X":', pos)
+        if start != -1:
+            try:
+                fields, end = json_decoder.raw_decode(buffer, start + 4)
+            except json.JSONDecodeError:
+                fields = None  # Entry is cut off, read more data
+            if fields is not None:
+                pos = end
+                fields = dict(zip(FILMLIST_FIELDS, fields))
+                channel = fields["channel"] = fields["channel"] or channel
+                topic = fields["topic"] = fields["topic"] or topic
+                yield fields
+                continue
+        if exhausted:
+            return
+        buffer = buffer[pos:]
+        pos = 0
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            exhausted = True
+            buffer += text_decoder.decode(b"", final=True)
+            continue
+        buffer += text_decoder.decode(decompressor.decompress(chunk))
+
+
+class FilmList:
+    """Local SQLite mirror of the MediathekView film list with a full-text index.
+
+    Built with update() from the full list and kept current with update(diff=True).
+    search() answers the same queries as the mediathekviewweb API.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS films (
+            rowid INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            channel TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            url_video TEXT NOT NULL,
+            url_video_hd TEXT NOT NULL,
+            url_video_low TEXT NOT NULL,
+            loaded_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS films_timestamp ON films (timestamp);
+        CREATE VIRTUAL TABLE IF NOT EXISTS films_fts USING fts5(
+            topic, title, description, content='films', content_rowid='rowid'
+        );
+        CREATE TRIGGER IF NOT EXISTS films_ai AFTER INSERT ON films BEGIN
+            INSERT INTO films_fts (rowid, topic, title, description)
+            VALUES (new.rowid, new.topic, new.title, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS films_ad AFTER DELETE ON films BEGIN
+            INSERT INTO films_fts (films_fts, rowid, topic, title, description)
+            VALUES ('delete', old.rowid, old.topic, old.title, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS films_au AFTER UPDATE OF topic, title, description ON films BEGIN
+            INSERT INTO films_fts (films_fts, rowid, topic, title, description)
+            VALUES ('delete', old.rowid, old.topic, old.title, old.description);
+            INSERT INTO films_fts (rowid, topic, title, description)
+            VALUES (new.rowid, new.topic, new.title, new.description);
+        END;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or FILMLIST_DB
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """One connection per thread, created on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        return conn
+
+    def updated_at(self) -> float | None:
+        if not self.path.exists():
+            return None
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'updated'").fetchone()
+        return float(row[0]) if row else None
+
+    def is_fresh(self, max_age: int = FILMLIST_MAX_AGE) -> bool:
+        updated = self.updated_at()
+        return updated is not None and time.time() - updated < max_age
+
+    def update(self, diff: bool = False) -> int:
+        """Download the full (or diff) film list and upsert it. Returns the number of films."""
+        url = FILMLIST_DIFF_URL if diff else FILMLIST_URL
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            return self.load(response.iter_content(1024 * 1024), replace=not diff)
+
+    def load(self, chunks: Iterator[bytes], replace: bool = False) -> int:
+        """Upsert the films from an xz-compressed film list.
+
+        With replace, films that are no longer in the list are removed.
+        """
+        started = time.time()
+        count = 0
+        conn = self.conn
+        with conn:
+            for entry in iter_filmlist_entries(chunks):
+                if not entry.get("url_video") or not entry.get("title"):
+                    continue  # List header or broken entry
+                url_video = entry["url_video"]
+                film_id = hashlib.sha1(
+                    f"{entry['channel']}|{entry['topic']}|{entry['title']}|{url_video}".encode()
+                ).hexdigest()
+                conn.execute(
+                    "INSERT INTO films (id, channel, topic, title, description, duration, timestamp, "
+                    "url_video, url_video_hd, url_video_low, loaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET description = excluded.description, "
+                    "duration = excluded.duration, timestamp = excluded.timestamp, "
+                    "url_video_hd = excluded.url_video_hd, url_video_low = excluded.url_video_low, "
+                    "loaded_at = excluded.loaded_at",
+                    (
+                        film_id,
+                        entry["channel"],
+                        entry["topic"],
+                        entry["title"],
+                        entry.get("description", ""),
+                        _parse_filmlist_duration(entry.get("duration", "")),
+                        int(entry.get("timestamp") or 0),
+                        url_video,
+                        _expand_filmlist_url(url_video, entry.get("url_video_hd", "")),
+                        _expand_filmlist_url(url_video, entry.get("url_video_low", "")),
+                        started,
+                    ),
+                )
+                count += 1
+            if replace:
+                # Every film in the full list was just written with this load's timestamp
+                conn.execute("DELETE FROM films WHERE loaded_at < ?", (started,))
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('updated', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (str(started),),
+            )
+        return count
+
+    @staticmethod
+    def _match_expression(column: str, query: str) -> str:
+        terms = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        return f"{column} : ({terms})"
+
+    def search(
+        self,
+        topic: str,
+        title: str | None = None,
+        min_duration: int | None = None,
+        max_results: int = 10,
+        offset: int = 0,
+    ) -> list[MediathekResult]:
+        """Search the mirror, newest first, like the mediathekviewweb API does."""
+        match = self._match_expression("topic", topic)
+        if title:
+            match += " AND " + self._match_expression("title", title)
+        rows = self.conn.execute(
+            "SELECT films.title, films.topic, channel, films.description, duration, timestamp, "
+            "url_video, url_video_hd, url_video_low, id FROM films_fts "
+            "JOIN films ON films.rowid = films_fts.rowid "
+            "WHERE films_fts MATCH ? AND duration >= ? AND timestamp <= ? "
+            "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (match, min_duration or 0, int(time.time()), max_results, offset),
+        ).fetchall()
+        return [
+            MediathekResult(
+                title=row[0],
+                topic=row[1],
+                channel=row[2],
+                description=row[3],
+                duration=row[4],
+                timestamp=row[5],
+                url_video=row[6],
+                url_video_hd=row[7],
+                url_video_low=row[8],
+                id=row[9],
+            )
+            for row in rows
         ]
 
-    return mediathek_results
+
+_film_list: FilmList | None = None
+
+
+def get_film_list() -> FilmList:
+    global _film_list
+    if _film_list is None:
+        _film_list = FilmList()
+    return _film_list
+
+
+class DurationCache:
+    """On-disk cache of video durations, keyed by path, size and mtime.
+
+    A file that is replaced or re-downloaded gets a new size/mtime and is probed
+    again. Failed probes are cached for DURATION_FAILURE_TTL only, so unreadable
+    files are not probed on every call but a missing or flaky ffprobe doesn't
+    stick.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path = path or DURATION_CACHE_FILE
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            try:
+                self._entries = json.loads(path.read_text())
+            except (OSError, ValueError):
+                self._entries = {}
+
+    @staticmethod
+    def _identity(video_path: Path) -> tuple[str, int, int] | None:
+        try:
+            stat = video_path.stat()
+        except OSError:
+            return None
+        return str(video_path.resolve()), stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, video_path: Path) -> tuple[bool, float | None]:
+        """Return (hit, duration) for the current state of the file."""
+        identity = self._identity(video_path)
+        if identity is None:
+            return False, None
+        key, size, mtime_ns = identity
+        entry = self._entries.get(key)
+        if not entry or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+            return False, None
+        if entry["duration"] is None and time.time() - entry.get("checked", 0) > DURATION_FAILURE_TTL:
+            return False, None
+        return True, entry["duration"]
+
+    def store(self, video_path: Path, duration: float | None):
+        identity = self._identity(video_path)
+        if identity is None:
+            return
+        key, size, mtime_ns = identity
+        with self._lock:
+            self._entries[key] = {"size": size, "mtime_ns": mtime_ns, "duration": duration}
+            if duration is None:
+                self._entries[key]["checked"] = time.time()
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(self._entries))
+            temp_path.replace(self.path)
+
+
+_duration_cache: DurationCache | None = None
+_duration_cache_lock = threading.Lock()
+
+
+def get_duration_cache() -> DurationCache:
+    global _duration_cache
+    with _duration_cache_lock:
+        if _duration_cache is None:
+            _duration_cache = DurationCache()
+    return _duration_cache
 
 
 def get_video_duration_seconds(video_path: Path) -> float | None:
+    """Get video duration in seconds, from the duration cache or the file itself."""
+    return get_video_durations_seconds([video_path])[video_path]
+
+
+def get_video_durations_seconds(video_paths: list[Path], max_workers: int | None = None) -> dict[Path, float | None]:
+    """Get durations for several videos, probing cache misses in parallel.
+
+    Every ffprobe call is its own process already, so a thread pool is enough to
+    run them side by side.
+    """
+    cache = get_duration_cache()
+    durations = {}
+    misses = []
+    for video_path in video_paths:
+        hit, duration = cache.lookup(video_path)
+        if hit:
+            durations[video_path] = duration
+        else:
+            misses.append(video_path)
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for video_path, duration in zip(misses, executor.map(probe_video_duration_seconds, misses)):
+                durations[video_path] = duration
+                cache.store(video_path, duration)
+        cache.save()
+    return durations
+
+
+def _iter_mp4_boxes(data, start: int, end: int):
+    """Yield (type, payload_start, box_end) for the MP4 boxes in data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            return
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_mp4_box(data, start: int, end: int, box_type: bytes) -> tuple[int, int] | None:
+    for found_type, payload_start, box_end in _iter_mp4_boxes(data, start, end):
+        if found_type == box_type:
+            return payload_start, box_end
+    return None
+
+
+def _mp4_duration(data) -> float | None:
+    """Read the duration from moov/mvhd (or moov/mvex/mehd for fragmented files)."""
+    moov = _find_mp4_box(data, 0, len(data), b"moov")
+    if not moov:
+        return None
+    mvhd = _find_mp4_box(data, *moov, b"mvhd")
+    if not mvhd:
+        return None
+    start, end = mvhd
+    version = data[start]
+    if version == 1 and start + 32 <= end:
+        timescale, duration = struct.unpack_from(">IQ", data, start + 20)
+    elif version == 0 and start + 20 <= end:
+        timescale, duration = struct.unpack_from(">II", data, start + 12)
+    else:
+        return None
+    if not duration:
+        # Fragmented MP4: the movie header has no duration, the extends header might
+        mvex = _find_mp4_box(data, *moov, b"mvex")
+        mehd = mvex and _find_mp4_box(data, *mvex, b"mehd")
+        if mehd:
+            start, end = mehd
+            if data[start] == 1 and start + 12 <= end:
+                duration = struct.unpack_from(">Q", data, start + 4)[0]
+            elif start + 8 <= end:
+                duration = struct.unpack_from(">I", data, start + 4)[0]
+    if not timescale or not duration:
+        return None
+    return duration / timescale
+
+
+EBML_HEADER = 0x1A45DFA3
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_CLUSTER = 0x1F43B675
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+
+
+def _read_ebml_vint(data, offset: int, keep_marker: bool) -> tuple[int | None, int]:
+    """Read an EBML variable-length integer. Returns (value, new_offset).
+
+    The value is None for the reserved "unknown size" encoding.
+    """
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or offset + length > len(data):
+        raise ValueError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, offset + length
+    return value, offset + length
+
+
+def _iter_ebml_elements(data, start: int, end: int):
+    """Yield (id, payload_start, payload_end) for the EBML elements in data[start:end]."""
+    offset = start
+    while offset < end:
+        element_id, offset = _read_ebml_vint(data, offset, keep_marker=True)
+        size, offset = _read_ebml_vint(data, offset, keep_marker=False)
+        payload_end = end if size is None else offset + size
+        yield element_id, offset, min(payload_end, end)
+        offset = payload_end
+
+
+def _webm_duration(data) -> float | None:
+    """Read the duration from the EBML Segment/Info element."""
+    for element_id, start, end in _iter_ebml_elements(data, 0, len(data)):
+        if element_id == EBML_HEADER:
+            continue
+        if element_id != EBML_SEGMENT:
+            return None
+        for child_id, child_start, child_end in _iter_ebml_elements(data, start, end):
+            if child_id == EBML_CLUSTER:
+                return None  # Info always comes before the first cluster
+            if child_id != EBML_INFO:
+                continue
+            timecode_scale = 1_000_000  # nanoseconds, the Matroska default
+            duration = None
+            for info_id, info_start, info_end in _iter_ebml_elements(data, child_start, child_end):
+                if info_id == EBML_TIMECODE_SCALE:
+                    timecode_scale = int.from_bytes(data[info_start:info_end], "big")
+                elif info_id == EBML_DURATION and info_end - info_start in (4, 8):
+                    fmt = ">f" if info_end - info_start == 4 else ">d"
+                    duration = struct.unpack_from(fmt, data, info_start)[0]
+            if not duration:
+                return None
+            return duration * timecode_scale / 1e9
+        return None
+    return None
+
+
+def read_container_duration(video_path: Path) -> float | None:
+    """Read the duration straight from the MP4 or WebM container headers.
+
+    Returns None if the container can't be parsed, so callers can fall back to ffprobe.
+    """
+    try:
+        with open(video_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[4:8] == b"ftyp":
+                return _mp4_duration(data)
+            if data[:4] == b"\x1a\x45\xdf\xa3":
+                return _webm_duration(data)
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+    return None
+
+
+def probe_video_duration_seconds(video_path: Path) -> float | None:
+    """Get video duration in seconds from the container, falling back to ffprobe."""
+    with TRACER.span("probe", file=video_path.name) as span:
+        duration = read_container_duration(video_path)
+        if duration is not None:
+            span["method"] = "container"
+            return duration
+        span["method"] = "ffprobe"
+        return ffprobe_video_duration_seconds(video_path)
+
+
+def ffprobe_video_duration_seconds(video_path: Path) -> float | None:
     """Get video duration in seconds using ffprobe."""
     try:
         result = subprocess.run(
@@ -139,33 +935,375 @@ def get_video_duration_seconds(video_path: Path) -> float | None:
     return None
 
 
+def is_direct_video_url(url: str) -> bool:
+    """Return True if the URL points to a plain video file rather than a player page or playlist."""
+    return urlparse(url).path.lower().endswith(DIRECT_VIDEO_EXTENSIONS)
+
+
+def download_part_paths(output_path: Path, url: str) -> tuple[Path, Path]:
+    """Return the part file and progress sidecar of a direct download of url to output_path."""
+    # Not .part, which yt-dlp would try to resume for a fallback URL
+    key = hashlib.sha1(url.encode()).hexdigest()[:8]
+    part_path = output_path.with_name(f"{output_path.name}.{key}.download")
+    return part_path, part_path.with_name(part_path.name + ".json")
+
+
+def remove_part_files(output_path: Path):
+    """Remove the leftover direct download parts of all variants of output_path."""
+    for path in output_path.parent.glob(f"{glob.escape(output_path.name)}.*.download*"):
+        path.unlink(missing_ok=True)
+
+
+def download_direct(
+    url: str,
+    output_path: Path,
+    connections: int = DOWNLOAD_CONNECTIONS,
+    segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+    retries: int = DOWNLOAD_RETRIES,
+) -> bool:
+    """Download a plain video file with parallel HTTP Range requests.
+
+    The data is written into a preallocated <name>.<url hash>.download file, and
+    finished segments are recorded in a .download.json sidecar next to it, so an
+    interrupted download resumes where it stopped, and each variant of a video
+    keeps its own progress. Failed segments are retried a few times before
+    giving up. Returns False if the server doesn't support range requests (so
+    the caller can fall back to yt-dlp), and raises requests.RequestException
+    on network errors.
+    """
+    part_path, progress_path = download_part_paths(output_path, url)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    with VIDEO_LIMITER.slot(url):
+        head = session.head(url, allow_redirects=True, timeout=30)
+    head.raise_for_status()
+    total_size = int(head.headers.get("Content-Length") or 0)
+    if not total_size or head.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return False
+    url = head.url  # Skip the redirects for every segment
+
+    done = set()
+    if progress_path.exists() and part_path.exists():
+        try:
+            progress = json.loads(progress_path.read_text())
+        except ValueError:
+            progress = {}
+        if progress.get("size") == total_size and progress.get("segment_size") == segment_size:
+            done = set(progress.get("done", []))
+    if not done:
+        with open(part_path, "wb") as f:
+            f.truncate(total_size)
+
+    lock = threading.Lock()
+    transferred = 0
+
+    def write_progress():
+        progress_path.write_text(json.dumps({
+            "url": url,
+            "size": total_size,
+            "segment_size": segment_size,
+            "done": sorted(done),
+        }))
+
+    fd = os.open(part_path, os.O_WRONLY)
+
+    def fetch_segment(start: int):
+        with lock:
+            if start in done:
+                return
+        end = min(start + segment_size, total_size) - 1
+        headers = {"Range": f"bytes={start}-{end}"}
+        with VIDEO_LIMITER.slot(url), session.get(url, headers=headers, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise requests.RequestException(f"Server ignored range request for {url}")
+            offset = start
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        if offset != end + 1:
+            raise requests.RequestException(f"Incomplete segment {start}-{end} for {url}")
+        nonlocal transferred
+        with lock:
+            done.add(start)
+            transferred += offset - start
+            write_progress()
+
+    try:
+        with TRACER.span("transfer", host=url_host(url), file=output_path.name) as span, \
+                ThreadPoolExecutor(max_workers=connections) as executor:
+            try:
+                for attempt in range(retries + 1):
+                    missing = [start for start in range(0, total_size, segment_size) if start not in done]
+                    # Let the whole round finish, so no segment is still running when the next round starts
+                    futures = [executor.submit(fetch_segment, start) for start in missing]
+                    wait(futures)
+                    errors = [future.exception() for future in futures if future.exception()]
+                    if not errors:
+                        break
+                    if attempt == retries or not isinstance(errors[0], requests.RequestException):
+                        raise errors[0]
+                    time.sleep(2 ** attempt)
+            finally:
+                span["bytes"] = transferred
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+        session.close()
+
+    part_path.replace(output_path)
+    progress_path.unlink(missing_ok=True)
+    return True
+
+
+class YtDlpEngine:
+    """yt-dlp inside this process, sharing one YoutubeDL for the whole run.
+
+    Python start-up, the extractor import and reading browser cookies happen
+    once instead of for every episode. Extractions run on the shared instance
+    in worker threads. Downloads need their own output template, so each one
+    gets a short-lived YoutubeDL that is handed the already extracted info and
+    a snapshot of the shared cookie jar.
+    """
+
+    def __init__(self, cookies_from_browser: str | None = None, max_workers: int = YTDLP_WORKERS):
+        self.params = {"quiet": True, "no_warnings": True}
+        if cookies_from_browser:
+            self.params["cookiesfrombrowser"] = (cookies_from_browser,)
+        self.ydl = yt_dlp.YoutubeDL(self.params)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cookie_file: str | None = None
+        self._lock = threading.Lock()
+
+    def extract(self, url: str) -> Future:
+        """Extract the info dict for url in a worker thread."""
+        return self._executor.submit(self.ydl.extract_info, url, download=False)
+
+    def search(self, query: str, max_results: int = 5) -> Future:
+        """Run a YouTube search in a worker thread, resolving to its flat entries."""
+        def run():
+            # process=False leaves the entries unresolved, like --flat-playlist
+            info = self.ydl.extract_info(f"ytsearch{max_results}:{query}", download=False, process=False)
+            return list(itertools.islice(info.get("entries") or [], max_results))
+        return self._executor.submit(run)
+
+    def _get_cookie_file(self) -> str | None:
+        if "cookiesfrombrowser" not in self.params:
+            return None
+        with self._lock:
+            if self._cookie_file is None:
+                fd, self._cookie_file = tempfile.mkstemp(prefix="mediathek-cookies-", suffix=".txt")
+                os.close(fd)
+                atexit.register(os.unlink, self._cookie_file)
+                self.ydl.cookiejar.save(self._cookie_file)
+        return self._cookie_file
+
+    def download(self, url: str, output_path: Path, merge_output_format: str | None = None):
+        """Download url to output_path. Raises yt_dlp.utils.DownloadError on failure."""
+        info = self.extract(url).result()
+        params = {"outtmpl": str(output_path), "cookiefile": self._get_cookie_file()}
+        if merge_output_format:
+            params["merge_output_format"] = merge_output_format
+        with yt_dlp.YoutubeDL(params) as ydl:
+            ydl.process_ie_result(info, download=True)
+
+
+_ytdlp_engines: dict[str | None, YtDlpEngine] = {}
+_ytdlp_engines_lock = threading.Lock()
+
+
+def set_ytdlp_mode(mode: str) -> bool:
+    """Switch between "subprocess" and "inprocess". Returns False if yt_dlp is not installed."""
+    global YTDLP_MODE
+    if mode == "inprocess" and yt_dlp is None:
+        return False
+    YTDLP_MODE = mode
+    return True
+
+
+def ytdlp_in_process() -> bool:
+    return YTDLP_MODE == "inprocess" and yt_dlp is not None
+
+
+def get_ytdlp_engine(cookies_from_browser: str | None = None) -> YtDlpEngine:
+    with _ytdlp_engines_lock:
+        if cookies_from_browser not in _ytdlp_engines:
+            _ytdlp_engines[cookies_from_browser] = YtDlpEngine(cookies_from_browser)
+        return _ytdlp_engines[cookies_from_browser]
+
+
+def ytdlp_download(
+    url: str,
+    output_path: Path,
+    merge_output_format: str | None = None,
+    cookies_from_browser: str | None = None,
+):
+    """Download url with yt-dlp, in-process if enabled.
+
+    Both modes raise subprocess.CalledProcessError on failure, so callers
+    handle errors the same way.
+    """
+    with VIDEO_LIMITER.slot(url), \
+            TRACER.span("ytdlp", host=url_host(url), file=Path(output_path).name, mode=YTDLP_MODE) as span:
+        if ytdlp_in_process():
+            try:
+                get_ytdlp_engine(cookies_from_browser).download(url, output_path, merge_output_format)
+            except yt_dlp.utils.DownloadError as e:
+                raise subprocess.CalledProcessError(1, ["yt-dlp", url], stderr=str(e)) from e
+        else:
+            args = ["yt-dlp"]
+            if merge_output_format:
+                args += ["--merge-output-format", merge_output_format]
+            args += ["-o", str(output_path), url]
+            if cookies_from_browser:
+                args += ["--cookies-from-browser", cookies_from_browser]
+            subprocess.run(args, check=True)
+        if os.path.exists(output_path):
+            span["bytes"] = os.path.getsize(output_path)
+
+
+def ytdlp_search(query: str, max_results: int = 5, timeout: int = 30) -> list[dict]:
+    """Search YouTube with yt-dlp. Returns the raw result dicts, or [] on failure."""
+    if ytdlp_in_process():
+        try:
+            return get_ytdlp_engine().search(query, max_results).result(timeout=timeout)
+        except Exception:
+            return []
+
+    try:
+        result = subprocess.run(
+            ["yt-dlp", f"ytsearch{max_results}:{query}", "--dump-json", "--flat-playlist", "--no-warnings"],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return []
+    if result.returncode != 0:
+        return []
+
+    entries = []
+    for line in result.stdout.splitlines():
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def probe_variant(quality: str, url: str, session: requests.Session) -> VariantProbe:
+    """Check if a variant is live, and get its size and a throughput estimate."""
+    headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+    try:
+        started = time.monotonic()
+        with session.get(url, headers=headers, stream=True, timeout=15) as response:
+            if response.status_code >= 400:
+                return VariantProbe(quality=quality, url=url, live=False)
+            received = 0
+            for chunk in response.iter_content(64 * 1024):
+                received += len(chunk)
+                if received >= PROBE_BYTES:
+                    break  # Server ignored the range, don't download the whole file
+            elapsed = time.monotonic() - started
+            size = None
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and "/" in content_range:
+                total = content_range.rsplit("/", 1)[1]
+                size = int(total) if total.isdigit() else None
+            elif response.headers.get("Content-Length", "").isdigit():
+                size = int(response.headers["Content-Length"])
+    except requests.RequestException:
+        return VariantProbe(quality=quality, url=url, live=False)
+    return VariantProbe(
+        quality=quality,
+        url=url,
+        live=True,
+        size=size,
+        throughput=received / elapsed if elapsed else None,
+    )
+
+
+def probe_variants(result: MediathekResult) -> list[VariantProbe]:
+    """Probe all video variants of a result concurrently."""
+    variants = result.get_variants()
+    if not variants:
+        return []
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(variants)) as executor:
+        futures = [executor.submit(probe_variant, quality, url, session) for quality, url in variants.items()]
+        return [future.result() for future in futures]
+
+
+def rank_variants(
+    probes: list[VariantProbe],
+    qualities: tuple[str, ...] = QUALITY_ORDER,
+    max_size: int | None = None,
+) -> list[VariantProbe]:
+    """Order live variants by preference.
+
+    Variants are ordered by their position in qualities. Variants larger than
+    max_size come last, smallest first, so they are only used if nothing else works.
+    """
+    live = [p for p in probes if p.live and p.quality in qualities]
+    live.sort(key=lambda p: qualities.index(p.quality))
+    if max_size is None:
+        return live
+    fitting = [p for p in live if p.size is None or p.size <= max_size]
+    too_large = sorted((p for p in live if p not in fitting), key=lambda p: p.size)
+    return fitting + too_large
+
+
 def download_mediathek_video(
     result: MediathekResult,
     output_path: Path,
     extract_duration: bool = False,
+    qualities: tuple[str, ...] | None = None,
+    max_size: int | None = None,
 ) -> DownloadResult:
-    """Download video from MediathekResult, trying HD -> normal -> low.
+    """Download video from MediathekResult, by default preferring HD -> normal -> low.
+
+    All variants are probed concurrently first, so dead links are skipped
+    without starting a download. Plain video files are downloaded in-process
+    with resumable range requests, everything else goes through yt-dlp.
 
     Args:
         result: MediathekResult with video URLs
         output_path: Path where the video should be saved
         extract_duration: If True, extract duration via ffprobe after download
+        qualities: Preferred order of variants, defaults to DOWNLOAD_QUALITIES
+        max_size: Prefer variants up to this many bytes, defaults to DOWNLOAD_MAX_SIZE
 
     Returns:
-        DownloadResult with success status and optional duration
+        DownloadResult with success status, the chosen variant and optional duration
     """
-    urls = [result.url_video_hd, result.url_video, result.url_video_low]
-    urls = [u for u in urls if u]
-
-    if not urls:
+    if not result.get_variants():
         return DownloadResult(success=False, error="No video URLs available")
 
-    for video_url in urls:
+    probes = probe_variants(result)
+    ranked = rank_variants(
+        probes, qualities=qualities or DOWNLOAD_QUALITIES, max_size=max_size or DOWNLOAD_MAX_SIZE
+    )
+    if not ranked:
+        return DownloadResult(success=False, error=f"None of {len(probes)} URLs is available")
+
+    for probe in ranked:
+        video_url = probe.url
+        downloaded = False
+        if is_direct_video_url(video_url):
+            try:
+                downloaded = download_direct(video_url, output_path)
+            except (requests.RequestException, OSError):
+                # Keep the .download file and its sidecar to resume on the next run,
+                # but give yt-dlp a chance at the same URL like before
+                pass
         try:
-            subprocess.run(
-                ["yt-dlp", "-o", str(output_path), video_url],
-                check=True,
-            )
+            if not downloaded:
+                ytdlp_download(video_url, output_path)
+            remove_part_files(output_path)
             duration_seconds = None
             if extract_duration and output_path.exists():
                 duration_seconds = get_video_duration_seconds(output_path)
@@ -173,14 +1311,15 @@ def download_mediathek_video(
                 success=True,
                 path=output_path,
                 duration_seconds=duration_seconds,
+                variant=probe.quality,
             )
-        except subprocess.CalledProcessError:
-            # Clean up partial file if it exists
+        except (subprocess.CalledProcessError, OSError):
+            # Clean up partial file if it exists (OSError: yt-dlp is not installed)
             if output_path.exists():
                 output_path.unlink()
             continue
 
     return DownloadResult(
         success=False,
-        error=f"All {len(urls)} URLs failed",
+        error=f"All {len(ranked)} available URLs failed",
     )
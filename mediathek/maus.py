@@ -7,36 +7,120 @@
 #     "pillow",
 #     "click",
 #     "tqdm",
+#     "numpy",
 # ]
 # ///
 """Download Sachgeschichten from wdrmaus.de"""
 
+import bisect
+import functools
+import hashlib
+import io
 import json
+import os
 import re
+import shutil
+import sqlite3
 import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 from urllib.parse import urljoin
 
 import click
 
-from lib import search_mediathekviewweb, download_mediathek_video
+from lib import (
+    TRACER,
+    HostLimiter,
+    download_mediathek_video,
+    format_duration,
+    get_film_list,
+    get_video_duration_seconds,
+    get_video_durations_seconds,
+    parse_duration,
+    probe_video_duration_seconds,
+    search_mediathekviewweb,
+    set_ytdlp_mode,
+    url_host,
+    ytdlp_download,
+    ytdlp_search,
+)
 import inquirer
 import requests
 from PIL import Image
 from tqdm import tqdm
 
+try:
+    import numpy
+except ImportError:  # Optional, only needed for `dedupe`
+    numpy = None
+
 BASE_DIR = Path(__file__).parent
 SACHGESCHICHTEN_DIR = BASE_DIR / "sachgeschichten"
 JSON_FILE = BASE_DIR / "sachgeschichten.json"
 MISSING_FILE = BASE_DIR / "sachgeschichten-missing.json"
+JOURNAL_FILE = BASE_DIR / "sachgeschichten-journal.jsonl"  # Changes not yet compacted into the JSON files
+JOURNAL_COMPACT_EVERY = 100
+DB_FILE = BASE_DIR / "sachgeschichten.db"  # Optional, created by `db-import`
+CRAWL_STATE_FILE = BASE_DIR / "crawl-state.json"
+SEARCH_CACHE_FILE = BASE_DIR / "youtube-search-cache.json"
+SEARCH_CACHE_TTL = 7 * 24 * 3600
+SEARCH_PREFETCH = 3  # findall searches this many upcoming episodes in the background
+IMAGE_HASH_FILE = BASE_DIR / "sachgeschichten-images.json"  # Source image hash per WebP file
+# Extra image sizes written next to <slug>.webp as <slug>.<name>.webp, e.g. {"thumb": 320}
+IMAGE_VARIANTS: dict[str, int] = {}
 INDEX_FILE = BASE_DIR / "index.md"
+FRAME_HASH_FILE = BASE_DIR / "sachgeschichten-framehashes.json"  # Perceptual frame hashes per video file
+REENCODE_STATE_FILE = BASE_DIR / "reencode-state.json"  # Result per re-encoded file, so reruns skip it
+COOKIES_BROWSER = os.environ.get("MAUS_COOKIES_BROWSER", "firefox")  # For yt-dlp's --cookies-from-browser
+INDEX_RENDER_EVERY = 25  # Bulk downloads refresh index.md after this many episodes
 
 
 ORANGE = (255, 165, 0)
 BLUE = (0, 150, 214)
 
 
+class VideoDirectory:
+    """Snapshot of the file names in SACHGESCHICHTEN_DIR.
+
+    Built with a single os.scandir pass on first use, so checking whether an
+    episode's video exists costs no syscalls. Code that creates, renames or
+    deletes videos has to add() them or refresh() the snapshot.
+    """
+
+    def __init__(self, directory: Path | None = None):
+        self.directory = directory or SACHGESCHICHTEN_DIR
+        self._names: set[str] | None = None
+
+    @property
+    def names(self) -> set[str]:
+        if self._names is None:
+            self.refresh()
+        return self._names
+
+    def refresh(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                self._names = {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            self._names = set()
+
+    def add(self, path: Path):
+        if path.parent == self.directory:
+            self.names.add(path.name)
+
+    def exists(self, path: Path) -> bool:
+        if path.parent != self.directory:
+            return path.exists()
+        return path.name in self.names
+
+
+VIDEO_DIRECTORY = VideoDirectory()
+
+
 @dataclass
 class Episode:
     """Unified episode data model."""
@@ -66,7 +150,7 @@ class Episode:
         """Find actual video file, checking multiple extensions."""
         for ext in self.VIDEO_EXTENSIONS:
             path = SACHGESCHICHTEN_DIR / f"{self.slug}{ext}"
-            if path.exists():
+            if VIDEO_DIRECTORY.exists(path):
                 return path
         return None
 
@@ -154,13 +238,252 @@ class Episode:
                 self.year = other.year
 
 
+class JsonStorage:
+    """Stores episodes in sachgeschichten.json and sachgeschichten-missing.json.
+
+    A save only appends the entries of the slugs the repository marked dirty to
+    a JSON Lines journal and fsyncs it, so a crash can at most lose the save in
+    progress. Once the journal holds JOURNAL_COMPACT_EVERY entries it is
+    compacted: both JSON files are rewritten sorted and moved into place
+    atomically, then the journal is removed. load() replays the journal on top
+    of the JSON files.
+    """
+
+    def __init__(self):
+        # Slugs in the files or journal, so removing an entry that was never saved writes nothing
+        self._saved: dict[str, set[str]] = {"downloaded": set(), "missing": set()}
+        self._journal_entries = 0
+        self._in_sync = False  # The JSON files hold exactly what was loaded or last compacted
+
+    @staticmethod
+    def _slug(kind: str, entry: dict) -> str:
+        episode = Episode.from_metadata(entry) if kind == "downloaded" else Episode.from_missing(entry)
+        return episode.slug
+
+    def load(self) -> tuple[list[dict], list[dict]]:
+        tables = {}
+        for kind, path in (("downloaded", JSON_FILE), ("missing", MISSING_FILE)):
+            entries = json.loads(path.read_text()) if path.exists() else []
+            tables[kind] = {self._slug(kind, entry): entry for entry in entries}
+        self._journal_entries = self._replay(tables)
+        self._saved = {kind: set(table) for kind, table in tables.items()}
+        self._in_sync = not self._journal_entries
+        return list(tables["downloaded"].values()), list(tables["missing"].values())
+
+    @staticmethod
+    def _replay(tables: dict[str, dict[str, dict]]) -> int:
+        """Apply the journal to tables, returning the number of entries replayed."""
+        if not JOURNAL_FILE.exists():
+            return 0
+        count = 0
+        valid_size = 0
+        with JOURNAL_FILE.open("rb") as f:
+            for line in f:
+                # A torn or malformed line ends the journal, like an incomplete write
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    record = json.loads(line)
+                    table, op, slug = tables[record["list"]], record["op"], record["slug"]
+                    data = record["data"] if op == "upsert" else None
+                    if op not in ("upsert", "delete") or not isinstance(slug, str):
+                        raise ValueError("malformed entry")
+                    if op == "upsert" and not isinstance(data, dict):
+                        raise ValueError("malformed entry")
+                except (ValueError, KeyError, TypeError):
+                    break
+                if op == "delete":
+                    table.pop(slug, None)
+                else:
+                    table[slug] = data
+                valid_size += len(line)
+                count += 1
+        if valid_size != JOURNAL_FILE.stat().st_size:
+            # Cut off the write that was interrupted, so new entries start on a fresh line
+            os.truncate(JOURNAL_FILE, valid_size)
+        return count
+
+    @staticmethod
+    def _rows(downloaded: dict[str, Episode], missing: dict[str, Episode]) -> dict[str, dict[str, dict]]:
+        return {
+            "downloaded": {slug: ep.to_metadata_dict() for slug, ep in downloaded.items()},
+            "missing": {slug: ep.to_missing_dict() for slug, ep in missing.items()},
+        }
+
+    def save(self, downloaded: dict[str, Episode], missing: dict[str, Episode], dirty: set[str]):
+        """Journal the current state of the dirty slugs in both lists."""
+        records = []
+        for slug in sorted(dirty):
+            for kind, table in (("downloaded", downloaded), ("missing", missing)):
+                episode = table.get(slug)
+                if episode is not None:
+                    entry = episode.to_metadata_dict() if kind == "downloaded" else episode.to_missing_dict()
+                    records.append({"op": "upsert", "list": kind, "slug": slug, "data": entry})
+                elif slug in self._saved[kind]:
+                    records.append({"op": "delete", "list": kind, "slug": slug})
+        if not records:
+            return
+
+        if self._journal_entries + len(records) >= JOURNAL_COMPACT_EVERY:
+            self._write_files(self._rows(downloaded, missing))
+            return
+        # One fsync per save: the records of a save become durable together
+        with JOURNAL_FILE.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_entries += len(records)
+        self._in_sync = False
+        for record in records:
+            if record["op"] == "delete":
+                self._saved[record["list"]].discard(record["slug"])
+            else:
+                self._saved[record["list"]].add(record["slug"])
+
+    def compact(self, downloaded: dict[str, Episode], missing: dict[str, Episode], dirty: set[str] | None = None):
+        """Write the complete JSON files and drop the journal, unless they are already up to date."""
+        if self._in_sync and not dirty:
+            return
+        self._write_files(self._rows(downloaded, missing))
+
+    def _write_files(self, rows: dict[str, dict[str, dict]]):
+        entries = sorted(rows["downloaded"].values(), key=lambda x: x.get("name", "").lower())
+        self._write_atomic(JSON_FILE, json.dumps(entries, indent=2, ensure_ascii=False))
+        missing_entries = sorted(rows["missing"].values(), key=lambda x: x.get("title", "").lower())
+        self._write_atomic(MISSING_FILE, json.dumps(missing_entries, indent=2, ensure_ascii=False))
+        # Only now is everything in the journal also in the files; replaying it again would be harmless
+        JOURNAL_FILE.unlink(missing_ok=True)
+        self._journal_entries = 0
+        self._saved = {kind: set(entries) for kind, entries in rows.items()}
+        self._in_sync = True
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str):
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with temp_path.open("w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(path)
+
+
+class SqliteStorage:
+    """Stores episodes in an SQLite database, writing only rows that changed.
+
+    The database runs in WAL mode and writes happen in short IMMEDIATE transactions,
+    so several processes can share it. Rows are only deleted if this process loaded
+    them, so entries added by another process in the meantime survive a save.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS downloaded (
+            slug TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL DEFAULT '',
+            alt_url TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS downloaded_url ON downloaded (url);
+        CREATE INDEX IF NOT EXISTS downloaded_alt_url ON downloaded (alt_url);
+        CREATE TABLE IF NOT EXISTS missing (
+            slug TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or DB_FILE
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        # Slugs of the rows this process loaded or wrote; only those may be deleted
+        self._saved: dict[str, set[str]] = {"downloaded": set(), "missing": set()}
+        self._loaded = False  # Rows come from load(), so the dirty slugs cover every change
+
+    def load(self) -> tuple[list[dict], list[dict]]:
+        downloaded = self.conn.execute("SELECT slug, data FROM downloaded ORDER BY name COLLATE NOCASE").fetchall()
+        missing = self.conn.execute("SELECT slug, data FROM missing ORDER BY title COLLATE NOCASE").fetchall()
+        self._saved = {
+            "downloaded": {slug for slug, _ in downloaded},
+            "missing": {slug for slug, _ in missing},
+        }
+        self._loaded = True
+        return [json.loads(data) for _, data in downloaded], [json.loads(data) for _, data in missing]
+
+    def save(self, downloaded: dict[str, Episode], missing: dict[str, Episode], dirty: set[str]):
+        """Upsert or delete the rows of the dirty slugs in one transaction."""
+        upsert_downloaded = [
+            (slug, ep.title, EpisodeRepository._normalize_url(ep.url), EpisodeRepository._normalize_url(ep.alt_url),
+             json.dumps(ep.to_metadata_dict(), ensure_ascii=False))
+            for slug in dirty if (ep := downloaded.get(slug)) is not None
+        ]
+        upsert_missing = [
+            (slug, ep.title, json.dumps(ep.to_missing_dict(), ensure_ascii=False))
+            for slug in dirty if (ep := missing.get(slug)) is not None
+        ]
+        delete_downloaded = [(slug,) for slug in dirty if slug not in downloaded and slug in self._saved["downloaded"]]
+        delete_missing = [(slug,) for slug in dirty if slug not in missing and slug in self._saved["missing"]]
+        if not (upsert_downloaded or upsert_missing or delete_downloaded or delete_missing):
+            return
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT INTO downloaded (slug, name, url, alt_url, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (slug) DO UPDATE SET name = excluded.name, url = excluded.url, "
+                "alt_url = excluded.alt_url, data = excluded.data",
+                upsert_downloaded,
+            )
+            self.conn.executemany(
+                "INSERT INTO missing (slug, title, data) VALUES (?, ?, ?) "
+                "ON CONFLICT (slug) DO UPDATE SET title = excluded.title, data = excluded.data",
+                upsert_missing,
+            )
+            self.conn.executemany("DELETE FROM downloaded WHERE slug = ?", delete_downloaded)
+            self.conn.executemany("DELETE FROM missing WHERE slug = ?", delete_missing)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._saved["downloaded"].update(row[0] for row in upsert_downloaded)
+        self._saved["missing"].update(row[0] for row in upsert_missing)
+        self._saved["downloaded"].difference_update(row[0] for row in delete_downloaded)
+        self._saved["missing"].difference_update(row[0] for row in delete_missing)
+
+    def compact(self, downloaded: dict[str, Episode], missing: dict[str, Episode], dirty: set[str] | None = None):
+        """Save, then fold the WAL back into the database file.
+
+        A storage that didn't load the rows itself (e.g. for db-import) writes all of them.
+        """
+        if not self._loaded:
+            dirty = set(downloaded) | set(missing)
+            self._loaded = True
+        self.save(downloaded, missing, dirty or set())
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def default_storage() -> JsonStorage | SqliteStorage:
+    """Use the SQLite database once it has been created with `db-import`."""
+    if DB_FILE.exists():
+        return SqliteStorage()
+    return JsonStorage()
+
+
 class EpisodeRepository:
     """Manages episode data with slug-based indexing."""
 
-    def __init__(self):
+    def __init__(self, storage: JsonStorage | SqliteStorage | None = None):
+        self.storage = storage or default_storage()
         self._downloaded: dict[str, Episode] = {}
         self._missing: dict[str, Episode] = {}
-        self._downloaded_urls: set[str] = set()  # Normalized URLs for quick lookup
+        # Normalized URL and @id (incl. legacy //filme aliases) -> downloaded episode
+        self._downloaded_urls: dict[str, Episode] = {}
+        # Slugs added, changed or removed in either list since the last save
+        self._dirty: set[str] = set()
+        # Serializes mutations and saves when downloading with several workers
+        self.lock = threading.RLock()
         self.reload()
 
     @staticmethod
@@ -174,19 +497,27 @@ class EpisodeRepository:
         self._downloaded.clear()
         self._missing.clear()
         self._downloaded_urls.clear()
-        if JSON_FILE.exists():
-            for entry in json.loads(JSON_FILE.read_text()):
-                ep = Episode.from_metadata(entry)
-                self._downloaded[ep.slug] = ep
-                # Index by URL for bulk matching
-                if ep.url:
-                    self._downloaded_urls.add(self._normalize_url(ep.url))
-                if ep.alt_url:
-                    self._downloaded_urls.add(self._normalize_url(ep.alt_url))
-        if MISSING_FILE.exists():
-            for entry in json.loads(MISSING_FILE.read_text()):
-                ep = Episode.from_missing(entry)
-                self._missing[ep.slug] = ep
+        self._dirty.clear()
+        downloaded, missing = self.storage.load()
+        for entry in downloaded:
+            ep = Episode.from_metadata(entry)
+            self._downloaded[ep.slug] = ep
+            self._index_urls(ep)
+        for entry in missing:
+            ep = Episode.from_missing(entry)
+            self._missing[ep.slug] = ep
+
+    def _index_urls(self, episode: Episode):
+        """Index an episode by URL for bulk matching."""
+        for url in (episode.url, episode.alt_url):
+            if url:
+                self._downloaded_urls[self._normalize_url(url)] = episode
+
+    def _unindex_urls(self, episode: Episode):
+        for url in (episode.url, episode.alt_url):
+            key = self._normalize_url(url)
+            if url and self._downloaded_urls.get(key) is episode:
+                del self._downloaded_urls[key]
 
     def is_url_downloaded(self, url: str) -> bool:
         """Check if a URL is already in the downloaded list."""
@@ -194,20 +525,29 @@ class EpisodeRepository:
 
     def get_by_url(self, url: str) -> Episode | None:
         """Get episode by URL."""
-        normalized = self._normalize_url(url)
-        for ep in self._downloaded.values():
-            if self._normalize_url(ep.url) == normalized or self._normalize_url(ep.alt_url) == normalized:
-                return ep
-        return None
+        return self._downloaded_urls.get(self._normalize_url(url))
 
-    def save(self):
-        entries = sorted([ep.to_metadata_dict() for ep in self._downloaded.values()],
-                        key=lambda x: x.get("name", "").lower())
-        JSON_FILE.write_text(json.dumps(entries, indent=2, ensure_ascii=False))
+    def mark_dirty(self, slug: str):
+        """Record a direct edit of an episode's fields, so the next save writes it."""
+        with self.lock:
+            self._dirty.add(slug)
 
-        missing = sorted([ep.to_missing_dict() for ep in self._missing.values()],
-                        key=lambda x: x.get("title", "").lower())
-        MISSING_FILE.write_text(json.dumps(missing, indent=2, ensure_ascii=False))
+    def save(self):
+        """Write the episodes marked dirty since the last save."""
+        with self.lock, TRACER.span("save", episodes=len(self._dirty)):
+            self.storage.save(self._downloaded, self._missing, self._dirty)
+            self._dirty = set()
+
+    def save_to(self, storage: JsonStorage | SqliteStorage):
+        """Write all episodes to another storage engine (for import/export)."""
+        with self.lock:
+            storage.compact(self._downloaded, self._missing, set(self._downloaded) | set(self._missing))
+
+    def compact(self):
+        """Save and compact the storage, e.g. fold the journal into the JSON files."""
+        with self.lock:
+            self.storage.compact(self._downloaded, self._missing, self._dirty)
+            self._dirty = set()
 
     def get_by_slug(self, slug: str) -> Episode | None:
         return self._downloaded.get(slug) or self._missing.get(slug)
@@ -223,10 +563,26 @@ class EpisodeRepository:
         missing_ep = self._missing.get(episode.slug)
         if missing_ep:
             episode.merge_from(missing_ep)
+        replaced = self._downloaded.get(episode.slug)
+        if replaced:
+            self._unindex_urls(replaced)
         self._downloaded[episode.slug] = episode
+        self._index_urls(episode)
+        self._dirty.add(episode.slug)
+
+    def remove_from_downloaded(self, slug: str):
+        episode = self._downloaded.pop(slug, None)
+        if episode:
+            self._unindex_urls(episode)
+            self._dirty.add(slug)
 
     def remove_from_missing(self, slug: str):
-        self._missing.pop(slug, None)
+        if self._missing.pop(slug, None):
+            self._dirty.add(slug)
+        # Called right after upsert_downloaded; picks up URLs set on the episode in between
+        downloaded_ep = self._downloaded.get(slug)
+        if downloaded_ep:
+            self._index_urls(downloaded_ep)
 
     def add_to_missing(self, episode: Episode) -> bool:
         """Add episode to missing list. Returns True only if newly added."""
@@ -234,9 +590,13 @@ class EpisodeRepository:
             return False
         existing = self._missing.get(episode.slug)
         if existing:
+            before = existing.to_missing_dict()
             existing.merge_from(episode)
+            if existing.to_missing_dict() != before:
+                self._dirty.add(episode.slug)
             return False  # Already existed, just merged
         self._missing[episode.slug] = episode
+        self._dirty.add(episode.slug)
         return True  # Newly added
 
     def get_all_downloaded(self) -> list[Episode]:
@@ -246,6 +606,18 @@ class EpisodeRepository:
         return list(self._missing.values())
 
 
+def open_repository() -> EpisodeRepository:
+    """The repository for a CLI command, compacted once the command finishes.
+
+    Saves in between only append to the journal, so a long run stays cheap.
+    """
+    repo = EpisodeRepository()
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None:
+        ctx.call_on_close(repo.compact)
+    return repo
+
+
 def info(msg: str):
     click.echo("  🐭 " + click.style(msg, fg=BLUE))
 
@@ -268,73 +640,75 @@ def header(msg: str):
     click.echo(click.style("  " + "─" * len(msg), fg=ORANGE))
 
 
+JSON_QUOTE_OR_ESCAPE = re.compile(r'\\.|"', re.DOTALL)
+NON_WHITESPACE = re.compile(r"\S")
+
+
 def fix_malformed_json(json_str: str) -> str:
     """Fix unescaped quotes in JSON string values.
 
     WDR's JSON-LD sometimes contains unescaped quotes inside string values,
     e.g. "description": "He said "hello" to her" - this function escapes them.
+    Runs in a single pass: only quotes and escape sequences are visited, and the
+    text in between is copied in chunks.
     """
     result = []
     in_string = False
-    i = 0
-    n = len(json_str)
+    copied_until = 0
 
-    while i < n:
-        char = json_str[i]
-
-        if char == '\\' and i + 1 < n:
+    for match in JSON_QUOTE_OR_ESCAPE.finditer(json_str):
+        if match.group() != '"':
             # Escape sequence - keep as is
-            result.append(char)
-            result.append(json_str[i + 1])
-            i += 2
             continue
-
-        if char == '"':
-            if not in_string:
-                # Starting a string
-                in_string = True
-                result.append(char)
-            else:
-                # Could be end of string or unescaped quote inside
-                # Look ahead to determine - end of string is followed by : , } ]
-                rest = json_str[i + 1:].lstrip()
-                if not rest or rest[0] in ',}]:':
-                    # This is the end of the string
-                    in_string = False
-                    result.append(char)
-                else:
-                    # Unescaped quote inside string - escape it
-                    result.append('\\"')
+        i = match.start()
+        if not in_string:
+            # Starting a string
+            in_string = True
+            continue
+        # Could be end of string or unescaped quote inside
+        # Look ahead to determine - end of string is followed by : , } ]
+        next_char = NON_WHITESPACE.search(json_str, i + 1)
+        if next_char is None or next_char.group() in ',}]:':
+            # This is the end of the string
+            in_string = False
         else:
-            result.append(char)
-
-        i += 1
+            # Unescaped quote inside string - escape it
+            result.append(json_str[copied_until:i])
+            result.append('\\"')
+            copied_until = i + 1
 
+    result.append(json_str[copied_until:])
     return ''.join(result)
 
 
+def parse_json_ld(json_str: str) -> dict:
+    """Parse WDR's JSON-LD, repairing unescaped quotes if plain parsing fails."""
+    try:
+        return json.loads(json_str, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(fix_malformed_json(json_str), strict=False)
+
+
 def fetch_metadata(url: str) -> dict:
     """Fetch and parse JSON-LD metadata from a wdrmaus.de page."""
-    response = requests.get(url)
-    response.raise_for_status()
+    with PAGE_LIMITER.slot(url), TRACER.span("metadata", host=url_host(url)) as span:
+        response = requests.get(url)
+        response.raise_for_status()
+        span["bytes"] = len(response.content)
+    return parse_metadata_html(response.text)
+
+
+JSON_LD_PATTERN = re.compile(r'<script type="application/ld\+json">\s*({.*?})\s*</script>', re.DOTALL)
 
+
+def parse_metadata_html(html: str) -> dict:
+    """Parse the JSON-LD metadata of a wdrmaus.de episode page."""
     # Find the JSON-LD script tag
-    match = re.search(
-        r'<script type="application/ld\+json">\s*({.*?})\s*</script>',
-        response.text,
-        re.DOTALL,
-    )
+    match = JSON_LD_PATTERN.search(html)
     if not match:
         raise ValueError("Keine JSON-LD Metadaten gefunden")
 
-    json_str = match.group(1)
-
-    # Try normal parsing first, fall back to fixing malformed JSON
-    try:
-        metadata = json.loads(json_str, strict=False)
-    except json.JSONDecodeError:
-        json_str = fix_malformed_json(json_str)
-        metadata = json.loads(json_str, strict=False)
+    metadata = parse_json_ld(match.group(1))
 
     # Remove publisher
     metadata.pop("publisher", None)
@@ -342,6 +716,7 @@ def fetch_metadata(url: str) -> dict:
     return metadata
 
 
+@functools.lru_cache(maxsize=None)
 def get_slug(title: str, year: str = "") -> str:
     """Convert title to slug: lowercase, spaces to dashes, with year appended."""
     slug = title.lower()
@@ -380,26 +755,13 @@ def get_year(metadata: dict) -> str:
 
 
 def get_video_duration(video_path: Path) -> str:
-    """Get video duration in MM:SS format using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                str(video_path),
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            seconds = float(result.stdout.strip())
-            minutes = int(seconds // 60)
-            secs = int(seconds % 60)
-            return f"{minutes}:{secs:02d}"
-    except Exception:
-        pass
-    return ""
+    """Get video duration in MM:SS format (cached, using ffprobe on a miss)."""
+    return format_duration(get_video_duration_seconds(video_path))
+
+
+def get_video_durations(video_paths: list[Path]) -> dict[Path, str]:
+    """Get durations in MM:SS format for several videos, probing misses in parallel."""
+    return {path: format_duration(seconds) for path, seconds in get_video_durations_seconds(video_paths).items()}
 
 
 def search_youtube(query: str, max_results: int = 5) -> list[dict]:
@@ -407,55 +769,96 @@ def search_youtube(query: str, max_results: int = 5) -> list[dict]:
 
     Each result contains: id, title, duration, channel, url
     """
+    results = []
+    for data in ytdlp_search(query, max_results):
+        duration_secs = data.get("duration") or 0
+        if duration_secs:
+            mins = int(duration_secs // 60)
+            secs = int(duration_secs % 60)
+            duration_str = f"{mins}:{secs:02d}"
+        else:
+            duration_str = "?"
+        # Get best thumbnail URL
+        thumbnail_url = data.get("thumbnail", "")
+        if not thumbnail_url and data.get("thumbnails"):
+            # Pick the last (usually highest quality) thumbnail
+            thumbnail_url = data["thumbnails"][-1].get("url", "")
+        results.append({
+            "id": data.get("id", ""),
+            "title": data.get("title", "Unbekannt"),
+            "duration": duration_str,
+            "channel": data.get("channel", data.get("uploader", "?")),
+            "url": data.get("url") or f"https://www.youtube.com/watch?v={data.get('id', '')}",
+            "thumbnail": thumbnail_url,
+        })
+    return results
+
+
+def read_json_entries(path: Path) -> dict:
+    """Read a cache or state file; a missing or unreadable one counts as empty."""
     try:
-        result = subprocess.run(
-            [
-                "yt-dlp",
-                f"ytsearch{max_results}:{query}",
-                "--dump-json",
-                "--flat-playlist",
-                "--no-warnings",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode != 0:
-            return []
+        entries = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
 
-        results = []
-        for line in result.stdout.strip().split("\n"):
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                duration_secs = data.get("duration") or 0
-                if duration_secs:
-                    mins = int(duration_secs // 60)
-                    secs = int(duration_secs % 60)
-                    duration_str = f"{mins}:{secs:02d}"
-                else:
-                    duration_str = "?"
-                # Get best thumbnail URL
-                thumbnail_url = data.get("thumbnail", "")
-                if not thumbnail_url and data.get("thumbnails"):
-                    # Pick the last (usually highest quality) thumbnail
-                    thumbnail_url = data["thumbnails"][-1].get("url", "")
-                results.append({
-                    "id": data.get("id", ""),
-                    "title": data.get("title", "Unbekannt"),
-                    "duration": duration_str,
-                    "channel": data.get("channel", data.get("uploader", "?")),
-                    "url": data.get("url") or f"https://www.youtube.com/watch?v={data.get('id', '')}",
-                    "thumbnail": thumbnail_url,
-                })
-            except json.JSONDecodeError:
-                continue
+
+class SearchCache:
+    """YouTube search results with an on-disk cache and background prefetching.
+
+    Results are kept for SEARCH_CACHE_TTL, so a restarted findall session shows
+    its candidates right away. Empty results are not cached, as they are usually
+    timeouts or network errors.
+    """
+
+    def __init__(self, path: Path | None = None, ttl: int = SEARCH_CACHE_TTL, max_workers: int = SEARCH_PREFETCH):
+        self.path = path or SEARCH_CACHE_FILE
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        now = time.time()
+        self._entries: dict[str, dict] = {
+            query: entry for query, entry in read_json_entries(self.path).items()
+            if isinstance(entry, dict) and now - entry.get("time", 0) < ttl
+        }
+        self._futures: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+
+    def _cached(self, query: str) -> list[dict] | None:
+        entry = self._entries.get(query)
+        if entry and time.time() - entry["time"] < self.ttl:
+            return entry["results"]
+        return None
+
+    def _search(self, query: str) -> list[dict]:
+        results = search_youtube(query, max_results=5)
+        if results:
+            with self._lock:
+                self._entries[query] = {"time": time.time(), "results": results}
+                temp_path = self.path.with_name(f".{self.path.name}.tmp")
+                temp_path.write_text(json.dumps(self._entries))
+                temp_path.replace(self.path)
         return results
-    except subprocess.TimeoutExpired:
-        return []
-    except Exception:
-        return []
+
+    def prefetch(self, query: str):
+        """Start searching for query in the background unless it is cached or running."""
+        with self._lock:
+            if self._cached(query) is not None or query in self._futures:
+                return
+            self._futures[query] = self._executor.submit(self._search, query)
+
+    def get(self, query: str) -> list[dict]:
+        """Return results for query, waiting for a running prefetch if there is one."""
+        with self._lock:
+            results = self._cached(query)
+            future = self._futures.pop(query, None)
+        if results is not None:
+            return results
+        if future:
+            return future.result()
+        return self._search(query)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 def download_video(url: str, output_path: Path, title: str = "") -> str:
@@ -465,10 +868,8 @@ def download_video(url: str, output_path: Path, title: str = "") -> str:
     mediathekviewweb for "Die Maus" episodes with matching title.
     """
     try:
-        subprocess.run(
-            ["yt-dlp", "--merge-output-format", "mp4", "-o", str(output_path), url, "--cookies-from-browser"],
-            check=True,
-        )
+        ytdlp_download(url, output_path, merge_output_format="mp4", cookies_from_browser=COOKIES_BROWSER)
+        VIDEO_DIRECTORY.add(output_path)
         return get_video_duration(output_path)
     except subprocess.CalledProcessError:
         if not title:
@@ -490,95 +891,270 @@ def download_video(url: str, output_path: Path, title: str = "") -> str:
                 result, output_path, extract_duration=True
             )
             if download_result.success:
+                VIDEO_DIRECTORY.add(output_path)
                 return download_result.duration_formatted
 
         # All attempts failed
         raise
 
 
-def download_image(url: str, output_path: Path):
-    """Download image and convert to webp."""
-    response = requests.get(url)
-    response.raise_for_status()
+class ImagePipeline:
+    """Downloads episode images and encodes them to WebP in a background worker pool.
+
+    Images are decoded from memory, and an image whose source bytes have the
+    same hash as last time is not encoded again. The size variants from
+    IMAGE_VARIANTS are written in the same pass.
+    """
+
+    def __init__(self, workers: int = 4, variants: dict[str, int] | None = None):
+        self.workers = workers
+        self.variants = IMAGE_VARIANTS if variants is None else variants
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._hashes: dict[str, str] | None = None
+
+    def submit(self, url: str, output_path: Path) -> Future:
+        """Queue an image; the future's result is False if it was unchanged."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor.submit(self._process, url, output_path)
+
+    def wait(self):
+        """Wait until all queued images are done."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def variant_path(self, output_path: Path, name: str) -> Path:
+        return output_path.with_name(f"{output_path.stem}.{name}.webp")
+
+    def _process(self, url: str, output_path: Path) -> bool:
+        with TRACER.span("image", host=url_host(url)) as span:
+            return self._encode(url, output_path, span)
+
+    def _encode(self, url: str, output_path: Path, span: dict) -> bool:
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        span["bytes"] = len(response.content)
+        source_hash = hashlib.sha256(response.content).hexdigest()
+        outputs = [output_path] + [self.variant_path(output_path, name) for name in self.variants]
+        missing_outputs = [path for path in outputs if not path.exists()]
+        if self._get_hash(output_path.name) == source_hash and not missing_outputs:
+            return False
 
-    # Save temporarily then convert
-    temp_path = output_path.with_suffix(".tmp")
-    temp_path.write_bytes(response.content)
+        with Image.open(io.BytesIO(response.content)) as img:
+            img.load()
+            self._save(img, output_path)
+            for name, width in self.variants.items():
+                variant = img.copy()
+                variant.thumbnail((width, width * 4))
+                self._save(variant, self.variant_path(output_path, name))
+        self._set_hash(output_path.name, source_hash)
+        return True
 
-    # Convert to webp
-    with Image.open(temp_path) as img:
-        img.save(output_path, "WEBP")
+    @staticmethod
+    def _save(img: Image.Image, path: Path):
+        buffer = io.BytesIO()
+        img.save(buffer, "WEBP")
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_bytes(buffer.getvalue())
+        temp_path.replace(path)
 
-    temp_path.unlink()
+    def _load_hashes(self) -> dict[str, str]:
+        if self._hashes is None:
+            self._hashes = read_json_entries(IMAGE_HASH_FILE)
+        return self._hashes
 
+    def _get_hash(self, name: str) -> str | None:
+        with self._lock:
+            return self._load_hashes().get(name)
 
-def build_table(headers: list, data: list) -> str:
-    """Build a markdown table with proper alignment."""
-    if not data:
-        return ""
+    def _set_hash(self, name: str, source_hash: str):
+        with self._lock:
+            hashes = self._load_hashes()
+            hashes[name] = source_hash
+            temp_path = IMAGE_HASH_FILE.with_name(f".{IMAGE_HASH_FILE.name}.tmp")
+            temp_path.write_text(json.dumps(hashes, indent=2, sort_keys=True))
+            temp_path.replace(IMAGE_HASH_FILE)
 
-    # Calculate column widths
-    widths = [len(h) for h in headers]
-    for row in data:
-        for i, cell in enumerate(row):
-            widths[i] = max(widths[i], len(cell))
 
-    # Build table
-    def format_row(cells):
-        return "| " + " | ".join(cell.ljust(widths[i]) for i, cell in enumerate(cells)) + " |"
+IMAGE_PIPELINE = ImagePipeline()
 
-    lines = [
-        format_row(headers),
-        "| " + " | ".join("-" * w for w in widths) + " |",
-    ]
-    for row in data:
-        lines.append(format_row(row))
 
-    return "\n".join(lines)
+def download_image(url: str, output_path: Path):
+    """Download image and convert to webp (blocking, raises on failure)."""
+    IMAGE_PIPELINE.submit(url, output_path).result()
 
 
-def update_index(repo: EpisodeRepository):
-    """Update the markdown tables in index.md (downloaded and missing separately)."""
-    # Build downloaded table
-    downloaded_headers = ["Titel", "Jahr", "Autor", "Dauer"]
-    downloaded_data = [
-        [ep.title, ep.year, ep.presenter, ep.duration]
-        for ep in sorted(repo.get_all_downloaded(), key=lambda x: x.title.lower())
-    ]
-    downloaded_table = build_table(downloaded_headers, downloaded_data)
+class IndexTable:
+    """One Markdown table of index.md, updated row by row.
 
-    # Build missing table
-    missing_headers = ["Titel", "Jahr", "Autor"]
-    missing_data = [
-        [ep.title, ep.year, ep.presenter]
-        for ep in sorted(repo.get_all_missing(), key=lambda x: x.title.lower())
-    ]
-    missing_table = build_table(missing_headers, missing_data)
+    Rows are kept sorted by title and column widths are tracked as per-column
+    counts of cell lengths, so a changed episode only re-sorts and re-formats
+    its own row, unless it changes the width of a column.
+    """
 
-    # Read current index.md
-    content = INDEX_FILE.read_text()
+    def __init__(self, headers: list[str]):
+        self.headers = headers
+        self._rows: dict[str, tuple[str, ...]] = {}
+        self._order: list[tuple[str, str]] = []  # Sorted (title key, slug)
+        self._lengths = [Counter({len(h): 1}) for h in headers]
+        self._widths: list[int] = [len(h) for h in headers]
+        self._lines: dict[str, str] = {}
+        self._text: str | None = None
 
-    # Replace downloaded section
-    new_content = re.sub(
-        r"(<!-- Beginn Sachgeschichtenindex -->\n\n).*?(\n\n<!-- Ende Sachgeschichtenindex -->)",
-        rf"\1{downloaded_table}\2",
-        content,
-        flags=re.DOTALL,
-    )
+    @staticmethod
+    def _key(slug: str, cells: tuple[str, ...]) -> tuple[str, str]:
+        return (cells[0].lower(), slug)
+
+    def update(self, rows: dict[str, tuple[str, ...]]) -> bool:
+        """Bring the table in line with rows (slug -> cells). Returns True if anything changed."""
+        changed = [slug for slug in self._rows if slug not in rows]
+        for slug in changed:
+            self._remove(slug)
+        for slug, cells in rows.items():
+            if self._rows.get(slug) == cells:
+                continue
+            if slug in self._rows:
+                self._remove(slug)
+            self._add(slug, cells)
+            changed.append(slug)
+        if not changed:
+            return False
+        widths = [max(lengths) for lengths in self._lengths]
+        if widths != self._widths:
+            self._widths = widths
+            self._lines.clear()
+        self._text = None
+        return True
 
-    # Replace or create missing section
-    if "<!-- Beginn Fehlt -->" in new_content:
-        new_content = re.sub(
-            r"(<!-- Beginn Fehlt -->\n\n).*?(\n\n<!-- Ende Fehlt -->)",
-            rf"\1{missing_table}\2",
-            new_content,
-            flags=re.DOTALL,
-        )
-    else:
-        # Add missing section at end
-        new_content = new_content.rstrip() + "\n\n\n## Fehlt\n\n<!-- Beginn Fehlt -->\n\n" + missing_table + "\n\n<!-- Ende Fehlt -->\n"
+    def _add(self, slug: str, cells: tuple[str, ...]):
+        self._rows[slug] = cells
+        bisect.insort(self._order, self._key(slug, cells))
+        for lengths, cell in zip(self._lengths, cells):
+            lengths[len(cell)] += 1
+
+    def _remove(self, slug: str):
+        cells = self._rows.pop(slug)
+        del self._order[bisect.bisect_left(self._order, self._key(slug, cells))]
+        for lengths, cell in zip(self._lengths, cells):
+            lengths[len(cell)] -= 1
+            if not lengths[len(cell)]:
+                del lengths[len(cell)]
+        self._lines.pop(slug, None)
+
+    def _format_row(self, cells) -> str:
+        return "| " + " | ".join(cell.ljust(width) for cell, width in zip(cells, self._widths)) + " |"
+
+    def text(self) -> str:
+        if not self._rows:
+            return ""
+        if self._text is None:
+            lines = [
+                self._format_row(self.headers),
+                "| " + " | ".join("-" * w for w in self._widths) + " |",
+            ]
+            for _, slug in self._order:
+                line = self._lines.get(slug)
+                if line is None:
+                    line = self._lines[slug] = self._format_row(self._rows[slug])
+                lines.append(line)
+            self._text = "\n".join(lines)
+        return self._text
+
+
+class IndexRenderer:
+    """Renders the downloaded and missing tables into index.md.
+
+    The tables are updated incrementally (see IndexTable) and the file is only
+    rewritten when its content actually changes. Bulk downloads call
+    episode_done() and get a render every INDEX_RENDER_EVERY episodes.
+    """
 
-    INDEX_FILE.write_text(new_content)
+    DOWNLOADED_SECTION = ("<!-- Beginn Sachgeschichtenindex -->\n\n", "\n\n<!-- Ende Sachgeschichtenindex -->")
+    MISSING_SECTION = ("<!-- Beginn Fehlt -->\n\n", "\n\n<!-- Ende Fehlt -->")
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or INDEX_FILE
+        self.downloaded = IndexTable(["Titel", "Jahr", "Autor", "Dauer"])
+        self.missing = IndexTable(["Titel", "Jahr", "Autor"])
+        # (mtime_ns, size, content) after our last write, to skip re-reading our own output
+        self._written: tuple[int, int, str] | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _replace_section(content: str, section: tuple[str, str], table: str) -> str | None:
+        begin, end = section
+        start = content.find(begin)
+        if start == -1:
+            return None
+        start += len(begin)
+        stop = content.find(end, start)
+        if stop == -1:
+            return None
+        return content[:start] + table + content[stop:]
+
+    def _read(self) -> str:
+        stat = self.path.stat()
+        if self._written and self._written[:2] == (stat.st_mtime_ns, stat.st_size):
+            return self._written[2]
+        return self.path.read_text()
+
+    def _write(self, content: str):
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(content)
+        temp_path.replace(self.path)
+        stat = self.path.stat()
+        self._written = (stat.st_mtime_ns, stat.st_size, content)
+
+    def render(self, repo: EpisodeRepository) -> bool:
+        """Update index.md from the repository. Returns True if the file was rewritten."""
+        with repo.lock:
+            with self._lock:
+                self._pending = 0
+            self.downloaded.update({
+                ep.slug: (ep.title, ep.year, ep.presenter, ep.duration) for ep in repo.get_all_downloaded()
+            })
+            self.missing.update({
+                ep.slug: (ep.title, ep.year, ep.presenter) for ep in repo.get_all_missing()
+            })
+
+            content = self._read()
+            new_content = self._replace_section(content, self.DOWNLOADED_SECTION, self.downloaded.text())
+            if new_content is None:
+                new_content = content
+            missing_table = self.missing.text()
+            with_missing = self._replace_section(new_content, self.MISSING_SECTION, missing_table)
+            if with_missing is not None:
+                new_content = with_missing
+            else:
+                # Add missing section at end
+                new_content = new_content.rstrip() + "\n\n\n## Fehlt\n\n<!-- Beginn Fehlt -->\n\n" + missing_table + "\n\n<!-- Ende Fehlt -->\n"
+
+            if new_content == content:
+                return False
+            self._write(new_content)
+            return True
+
+    def episode_done(self, repo: EpisodeRepository, every: int | None = None):
+        """Count a finished bulk episode and render once every `every` episodes."""
+        with self._lock:
+            self._pending += 1
+            due = self._pending >= (every or INDEX_RENDER_EVERY)
+        if due:
+            self.render(repo)
+
+
+INDEX_RENDERER = IndexRenderer()
+
+
+def update_index(repo: EpisodeRepository) -> bool:
+    """Update the markdown tables in index.md (downloaded and missing separately)."""
+    with TRACER.span("index"):
+        return INDEX_RENDERER.render(repo)
 
 
 def download_episode(
@@ -587,13 +1163,15 @@ def download_episode(
     presenter: str = "",
     interactive: bool = False,
     original_year: str = "",
+    episode: Episode | None = None,
 ) -> tuple[bool, Episode | None]:
     """
     Core download logic. Returns (success, episode).
     original_year: If provided (from A-Z page), use this instead of metadata year.
+    episode: If provided (prefetched by the fetch stage), metadata isn't fetched again.
     """
-    metadata = fetch_metadata(url)  # Let exceptions propagate
-    episode = Episode.from_metadata(metadata)
+    if episode is None:
+        episode = Episode.from_metadata(fetch_metadata(url))  # Let exceptions propagate
 
     # Use original broadcast year if provided (from A-Z page)
     if original_year and original_year != episode.year:
@@ -604,16 +1182,20 @@ def download_episode(
         existing = repo.get_by_slug(episode.slug)
         if existing:
             if not existing.has_valid_duration():
-                existing.duration = get_video_duration(episode.video_path)
-                repo.save()
+                duration = get_video_duration(episode.video_path)
+                with repo.lock:
+                    existing.duration = duration
+                    repo.mark_dirty(existing.slug)
+                    repo.save()
             return True, existing
         # File exists but no JSON entry
         episode.duration = get_video_duration(episode.video_path)
         if presenter:
             episode.presenter = presenter
-        repo.upsert_downloaded(episode)
-        repo.remove_from_missing(episode.slug)
-        repo.save()
+        with repo.lock:
+            repo.upsert_downloaded(episode)
+            repo.remove_from_missing(episode.slug)
+            repo.save()
         return True, episode
 
     # Set presenter
@@ -630,24 +1212,22 @@ def download_episode(
     # Download video
     episode.duration = download_video(url, episode.video_path, title=episode.title)
 
-    # Download image (non-fatal)
+    # Download image in the background (non-fatal, failures are ignored)
     if episode.image_url:
-        try:
-            download_image(episode.image_url, episode.image_path)
-        except Exception:
-            pass
+        IMAGE_PIPELINE.submit(episode.image_url, episode.image_path)
 
     # Save
-    repo.upsert_downloaded(episode)
-    repo.remove_from_missing(episode.slug)
-    repo.save()
+    with repo.lock:
+        repo.upsert_downloaded(episode)
+        repo.remove_from_missing(episode.slug)
+        repo.save()
 
     return True, episode
 
 
-def process_url(url: str) -> bool:
+def process_url(url: str, repo: EpisodeRepository) -> bool:
     """Process a single URL. Returns True on success, False on failure."""
-    repo = EpisodeRepository()
+    VIDEO_DIRECTORY.refresh()  # The interactive session may run for a long time
     episode = None
     try:
         # Fetch metadata for display
@@ -668,6 +1248,7 @@ def process_url(url: str) -> bool:
                 duration = get_video_duration(episode.video_path)
                 if duration:
                     existing.duration = duration
+                    repo.mark_dirty(existing.slug)
                     repo.save()
                     update_index(repo)
                     info(f"Dauer ergänzt: {duration}")
@@ -718,7 +1299,7 @@ def process_url(url: str) -> bool:
         repo.upsert_downloaded(episode)
         repo.remove_from_missing(episode.slug)
         repo.save()
-        success("sachgeschichten.json aktualisiert")
+        success("Folge gespeichert")
 
         # Update index
         update_index(repo)
@@ -760,22 +1341,26 @@ def process_url(url: str) -> bool:
 
 def parse_filter_letters(url: str) -> list[str]:
     """Parse the filter letters from the A-Z main page and return list of filter URLs."""
-    response = requests.get(url)
-    response.raise_for_status()
+    return parse_filter_html(fetch_page_text(url), url)
 
+
+# Pattern: <a href="../../filme/sachgeschichten/a-bis-z.php5?filter=X">X</a>
+FILTER_LIST_PATTERN = re.compile(r'<ul class="filterbuchstaben">.*?</ul>', re.DOTALL)
+FILTER_LINK_PATTERN = re.compile(r'<a href="([^"]+\?filter=[^"]+)">')
+
+
+def parse_filter_html(html: str, url: str) -> list[str]:
+    """Parse the filter letters from the A-Z main page HTML and return list of filter URLs."""
     # Find all filter letter links in <ul class="filterbuchstaben">
-    # Pattern: <a href="../../filme/sachgeschichten/a-bis-z.php5?filter=X">X</a>
-    pattern = r'<ul class="filterbuchstaben">.*?</ul>'
-    ul_match = re.search(pattern, response.text, re.DOTALL)
+    ul_match = FILTER_LIST_PATTERN.search(html)
     if not ul_match:
         raise ValueError("Could not find filterbuchstaben list")
 
     ul_content = ul_match.group(0)
 
     # Extract all filter URLs
-    link_pattern = r'<a href="([^"]+\?filter=[^"]+)">'
     filter_urls = []
-    for match in re.finditer(link_pattern, ul_content):
+    for match in FILTER_LINK_PATTERN.finditer(ul_content):
         href = match.group(1)
         full_url = urljoin(url, href)
         filter_urls.append(full_url)
@@ -783,11 +1368,79 @@ def parse_filter_letters(url: str) -> list[str]:
     return filter_urls
 
 
+class CrawlState:
+    """Remembers ETag, Last-Modified and a content hash per crawled URL.
+
+    Pages are requested conditionally, and a page that is unchanged (304, or
+    200 with the same content) is reported as such. A page is only recorded as
+    crawled once mark_done() is called, so pages whose processing failed are
+    fetched again on the next run.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or CRAWL_STATE_FILE
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = read_json_entries(self.path)
+        self._pending: dict[str, dict] = {}
+
+    def fetch_if_changed(self, url: str) -> str | None:
+        """Return the page content, or None if it hasn't changed since it was last marked done."""
+        entry = self._entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        with PAGE_LIMITER.slot(url):
+            response = requests.get(url, headers=headers)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        new_entry = {
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+            "hash": content_hash,
+        }
+        if entry.get("hash") == content_hash:
+            # Same content, but the server didn't do conditional requests: keep the new validators
+            self._store(url, new_entry)
+            return None
+        with self._lock:
+            self._pending[url] = new_entry
+        return response.text
+
+    def mark_done(self, url: str):
+        """Record the last fetched version of url as fully processed."""
+        with self._lock:
+            entry = self._pending.pop(url, None)
+        if entry:
+            self._store(url, entry)
+
+    def _store(self, url: str, entry: dict):
+        with self._lock:
+            self._entries[url] = entry
+            temp_path = self.path.with_name(f".{self.path.name}.tmp")
+            temp_path.write_text(json.dumps(self._entries, indent=2))
+            temp_path.replace(self.path)
+
+
 def parse_bulk_page(url: str) -> tuple[list[dict], list[dict]]:
-    """Parse an A-Z list page and return (available, missing) episodes."""
-    response = requests.get(url)
-    response.raise_for_status()
+    """Fetch and parse an A-Z list page and return (available, missing) episodes."""
+    return parse_bulk_html(fetch_page_text(url), url)
+
+
+BULK_AVAILABLE_PATTERN = re.compile(
+    r'<a class="intern" href="([^"]+)"[^>]*><span class="abiszTitel">(?:<i></i>)?([^<]+)\s*<span class="abiszJahr">\((\d{4})\)</span>'
+)
+BULK_MISSING_PATTERN = re.compile(
+    r'<li><span><span class="abiszTitel">([^<]+)\s*<span class="abiszJahr">\((\d{4})\)</span>'
+)
 
+
+def parse_bulk_html(html: str, url: str) -> tuple[list[dict], list[dict]]:
+    """Parse an A-Z list page and return (available, missing) episodes."""
     available = []
     missing = []
 
@@ -796,19 +1449,16 @@ def parse_bulk_page(url: str) -> tuple[list[dict], list[dict]]:
     # Missing: <li><span><span class="abiszTitel">Title <span class="abiszJahr">(1990)</span></span></span></li>
 
     # Match available (with links)
-    available_pattern = r'<a class="intern" href="([^"]+)"[^>]*><span class="abiszTitel">(?:<i></i>)?([^<]+)\s*<span class="abiszJahr">\((\d{4})\)</span>'
-    for match in re.finditer(available_pattern, response.text):
+    for match in BULK_AVAILABLE_PATTERN.finditer(html):
         href, title, year = match.groups()
-        full_url = urljoin(url, href)
         available.append({
             "title": title.strip(),
             "year": year,
-            "url": full_url,
+            "url": urljoin(url, href),
         })
 
     # Match missing (no links) - span directly inside li, not inside a
-    missing_pattern = r'<li><span><span class="abiszTitel">([^<]+)\s*<span class="abiszJahr">\((\d{4})\)</span>'
-    for match in re.finditer(missing_pattern, response.text):
+    for match in BULK_MISSING_PATTERN.finditer(html):
         title, year = match.groups()
         missing.append({
             "title": title.strip(),
@@ -818,21 +1468,510 @@ def parse_bulk_page(url: str) -> tuple[list[dict], list[dict]]:
     return available, missing
 
 
-def process_url_auto(url: str, presenter: str = "", repo: EpisodeRepository | None = None, original_year: str = "") -> bool:
+def process_url_auto(
+    url: str,
+    presenter: str = "",
+    repo: EpisodeRepository | None = None,
+    original_year: str = "",
+    episode: Episode | None = None,
+) -> bool:
     """Process a URL without interactive prompts. Returns True on success."""
     if repo is None:
         repo = EpisodeRepository()
     try:
-        success, _ = download_episode(url, repo, presenter=presenter, interactive=False, original_year=original_year)
+        success, _ = download_episode(
+            url, repo, presenter=presenter, interactive=False, original_year=original_year, episode=episode
+        )
         return success
     except Exception:
         return False
 
 
+# Our own requests to the WDR pages (A-Z lists and episode metadata), whatever pool they come from
+PAGE_LIMITER = HostLimiter(2)
+
+
+def download_all(
+    to_download: list[dict],
+    presenter_map: dict[str, str],
+    repo: EpisodeRepository,
+    jobs: int = 1,
+    fetch_jobs: int = 8,
+) -> list[dict]:
+    """Download episodes from an A-Z page with a bounded worker pool.
+
+    Metadata is fetched by up to fetch_jobs threads, which still share the
+    per-host cap of PAGE_LIMITER, and each episode is handed to the download
+    pool (at most jobs downloads at a time) as soon as its metadata arrives,
+    so metadata latency overlaps with video transfers. Entries that map to the
+    same slug are downloaded one after the other, so the second one finds the
+    video on disk like in a sequential run. Repository updates are serialized
+    through repo.lock, and index.md is refreshed every INDEX_RENDER_EVERY
+    episodes. Returns the failed entries.
+    """
+    slug_locks: dict[str, threading.Lock] = {}
+    slug_locks_lock = threading.Lock()
+
+    def fetch(ep: dict) -> Episode:
+        return Episode.from_metadata(fetch_metadata(ep["url"]))
+
+    def download(ep: dict, episode: Episode) -> bool:
+        presenter = presenter_map.get(ep["title"].lower(), "")
+        # download_episode prefers the A-Z year the same way, so this is the slug it will use
+        if ep["year"]:
+            episode.year = ep["year"]
+        with slug_locks_lock:
+            slug_lock = slug_locks.setdefault(episode.slug, threading.Lock())
+        with slug_lock:
+            ok = process_url_auto(
+                ep["url"], presenter=presenter, repo=repo, original_year=ep["year"], episode=episode
+            )
+        if ok:
+            INDEX_RENDERER.episode_done(repo)
+        return ok
+
+    failed = []
+    progress = tqdm(total=len(to_download), desc="  🐭 Lädt", unit=" Folge")
+    with ThreadPoolExecutor(max_workers=max(1, fetch_jobs)) as fetcher, \
+            ThreadPoolExecutor(max_workers=max(1, jobs)) as downloader:
+        fetches = {fetcher.submit(fetch, ep): ep for ep in to_download}
+        downloads = {}
+        for future in as_completed(fetches):
+            ep = fetches[future]
+            try:
+                episode = future.result()
+            except Exception:
+                failed.append(ep)
+                progress.update()
+                continue
+            download_future = downloader.submit(download, ep, episode)
+            download_future.add_done_callback(lambda _: progress.update())
+            downloads[download_future] = ep
+        for future in as_completed(downloads):
+            if not future.result():
+                failed.append(downloads[future])
+    progress.close()
+    return failed
+
+
+def fetch_page_text(url: str) -> str:
+    with PAGE_LIMITER.slot(url):
+        response = requests.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+# Codecs that can be remuxed into an MP4 container without re-encoding
+MP4_COMPATIBLE_CODECS = {"h264", "hevc", "av1", "vp9", "mpeg4", "aac", "mp3", "ac3", "eac3", "opus", "alac"}
+
+
+def probe_codecs(video_path: Path) -> list[str]:
+    """Return the codec names of the video and audio streams, using ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "stream=codec_type,codec_name",
+            "-of", "json",
+            str(video_path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    streams = json.loads(result.stdout).get("streams", [])
+    return [s.get("codec_name", "") for s in streams if s.get("codec_type") in ("video", "audio")]
+
+
+def convert_to_mp4(source: Path, target: Path) -> str:
+    """Convert a video to MP4, remuxing when the codecs allow it. Returns "remux" or "transcode".
+
+    ffmpeg writes to a temporary file that is moved into place when it is complete,
+    so an interrupted conversion never leaves a half-written target.
+    """
+    codecs = probe_codecs(source)
+    remux = bool(codecs) and set(codecs) <= MP4_COMPATIBLE_CODECS
+    if remux:
+        codec_args = ["-c", "copy"]
+    else:
+        # One thread per ffmpeg, the pool runs one conversion per core
+        codec_args = ["-c:v", "libx264", "-crf", "20", "-preset", "medium", "-c:a", "aac", "-b:a", "160k", "-threads", "1"]
+    temp_path = target.with_name(f".{target.name}.converting")
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-v", "error", "-i", str(source), "-map", "0:v", "-map", "0:a?",
+             *codec_args, "-movflags", "+faststart", "-f", "mp4", str(temp_path)],
+            check=True,
+            capture_output=True,
+        )
+        os.replace(temp_path, target)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    source.unlink()
+    return "remux" if remux else "transcode"
+
+
+def convert_all_to_mp4(conversions: list[tuple[Path, Path]], jobs: int | None = None) -> int:
+    """Convert (source, target) pairs in parallel, one ffmpeg per core. Returns the number converted."""
+    converted = 0
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = {executor.submit(convert_to_mp4, source, target): source for source, target in conversions}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="  🐭 Konvertiert", unit=" Datei"):
+            source = futures[future]
+            try:
+                mode = future.result()
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                error(f"Konvertierung fehlgeschlagen: {source.name}")
+                stderr = getattr(e, "stderr", None)
+                if stderr:
+                    stderr = stderr.decode() if isinstance(stderr, bytes) else stderr
+                    click.echo(f"    {stderr[-200:]}")
+                continue
+            converted += 1
+            if mode == "remux":
+                success(f"Umgepackt: {source.name}")
+            else:
+                success(f"Neu kodiert: {source.name}")
+    return converted
+
+
+# `dedupe` compares videos by perceptual hashes of frames at these relative positions
+DEDUPE_POSITIONS = (0.2, 0.35, 0.5, 0.65, 0.8)
+DEDUPE_FRAME_SIZE = 32
+
+
+@functools.cache
+def _dct_matrix(size: int):
+    k = numpy.arange(size).reshape(-1, 1)
+    i = numpy.arange(size).reshape(1, -1)
+    return numpy.cos(numpy.pi * (2 * i + 1) * k / (2 * size))
+
+
+def perceptual_hash(pixels: bytes, size: int = DEDUPE_FRAME_SIZE) -> int | None:
+    """64-bit DCT hash (pHash) of a grayscale frame, None for blank frames."""
+    image = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(size, size).astype(float)
+    if image.std() < 2:
+        # Black or single-colour frames look the same in every video
+        return None
+    dct = _dct_matrix(size)
+    low = (dct @ image @ dct.T)[:8, :8].flatten()
+    bits = low > numpy.median(low[1:])
+    return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+
+def sample_frame_hashes(video_path: Path, duration: float) -> list[int | None]:
+    """Hash one downscaled frame per DEDUPE_POSITIONS entry, decoded by ffmpeg."""
+    hashes = []
+    for position in DEDUPE_POSITIONS:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-v", "error", "-ss", f"{duration * position:.2f}", "-i", str(video_path),
+                "-frames:v", "1", "-vf", f"scale={DEDUPE_FRAME_SIZE}:{DEDUPE_FRAME_SIZE}:flags=area,format=gray",
+                "-f", "rawvideo", "-",
+            ],
+            capture_output=True,
+        )
+        if result.returncode != 0 or len(result.stdout) != DEDUPE_FRAME_SIZE ** 2:
+            hashes.append(None)
+        else:
+            hashes.append(perceptual_hash(result.stdout))
+    return hashes
+
+
+class FrameHashCache:
+    """Frame hashes per video, keyed by path, size and mtime like DurationCache."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or FRAME_HASH_FILE
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = read_json_entries(self.path)
+
+    def lookup(self, video_path: Path) -> list[int | None] | None:
+        stat = video_path.stat()
+        entry = self._entries.get(video_path.name)
+        positions = list(DEDUPE_POSITIONS)
+        if entry and (entry["size"], entry["mtime_ns"], entry["positions"]) == (stat.st_size, stat.st_mtime_ns, positions):
+            return entry["hashes"]
+        return None
+
+    def store(self, video_path: Path, hashes: list[int | None]):
+        stat = video_path.stat()
+        with self._lock:
+            self._entries[video_path.name] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "positions": list(DEDUPE_POSITIONS),
+                "hashes": hashes,
+            }
+
+    def save(self):
+        with self._lock:
+            temp_path = self.path.with_name(f".{self.path.name}.tmp")
+            temp_path.write_text(json.dumps(self._entries))
+            temp_path.replace(self.path)
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Finding all hashes within a small radius only visits the subtrees whose
+    edge distance is within that radius of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self._root: list | None = None  # [hash, items, {distance: child}]
+
+    def add(self, key: int, item):
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = (key ^ node[0]).bit_count()
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [item], {}]
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> list:
+        """Return the items of all hashes within radius of key."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            distance = (key ^ node[0]).bit_count()
+            if distance <= radius:
+                found.extend(node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def max_frame_distance(a: int, b: int, frames: int = len(DEDUPE_POSITIONS)) -> int:
+    """Largest Hamming distance between corresponding 64-bit frame hashes of two signatures."""
+    diff = a ^ b
+    return max(((diff >> (64 * i)) & 0xFFFFFFFFFFFFFFFF).bit_count() for i in range(frames))
+
+
+def find_duplicate_groups(
+    signatures: dict[Path, tuple[int, float]], threshold: int, duration_tolerance: float = 0.05
+) -> list[list[Path]]:
+    """Group videos whose frame hashes each differ by at most threshold bits and whose durations match.
+
+    The tree search over the combined signatures only narrows down the candidates,
+    as a total of threshold bits per frame could also be spent on a single frame.
+    """
+    radius = threshold * len(DEDUPE_POSITIONS)
+    tree = BKTree()
+    for path, (signature, _) in signatures.items():
+        tree.add(signature, path)
+
+    parent = {path: path for path in signatures}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    for path, (signature, duration) in signatures.items():
+        for other in tree.search(signature, radius):
+            other_signature, other_duration = signatures[other]
+            if other == path or max_frame_distance(signature, other_signature) > threshold:
+                continue
+            if abs(duration - other_duration) <= max(5, duration_tolerance * max(duration, other_duration)):
+                parent[find(other)] = find(path)
+
+    groups: dict[Path, list[Path]] = {}
+    for path in signatures:
+        groups.setdefault(find(path), []).append(path)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+# `reencode` turns old downloads into HEVC at low priority
+REENCODE_ARGS = ["-c:v", "libx265", "-crf", "26", "-preset", "medium", "-tag:v", "hvc1", "-c:a", "copy"]
+REENCODE_SKIP_CODECS = {"hevc", "av1"}  # Already efficient, not worth another generation loss
+REENCODE_THREADS = 2  # ffmpeg threads per job
+REENCODE_NICE = 19
+REENCODE_DURATION_TOLERANCE = 2  # seconds, the catalog stores whole seconds
+REENCODE_FREE_MARGIN = 512 * 1024 * 1024  # Left free on top of the source size, which the result may reach
+
+# Space promised to running re-encodes, whose results are still growing
+_reencode_reserved = 0
+_reencode_reserved_lock = threading.Lock()
+
+
+def low_priority(args: list[str]) -> list[str]:
+    """Prefix a command with nice, and ionice's idle class where available."""
+    prefix = []
+    if shutil.which("nice"):
+        prefix += ["nice", "-n", str(REENCODE_NICE)]
+    if shutil.which("ionice"):
+        prefix += ["ionice", "-c", "3"]
+    return prefix + args
+
+
+class ReencodeState:
+    """Sizes before and after per re-encoded file, keyed by file name.
+
+    An entry is only valid while the file still has the recorded size and
+    mtime, so a file that was replaced by a new download is considered again.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or REENCODE_STATE_FILE
+        self._entries: dict[str, dict] = read_json_entries(self.path)
+
+    def is_done(self, video_path: Path) -> bool:
+        entry = self._entries.get(video_path.name)
+        if not entry:
+            return False
+        stat = video_path.stat()
+        return (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+
+    def record(self, video_path: Path, size_before: int, status: str):
+        stat = video_path.stat()
+        self._entries[video_path.name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "size_before": size_before,
+            "saved": size_before - stat.st_size,
+            "status": status,
+        }
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(json.dumps(self._entries, indent=2))
+        temp_path.replace(self.path)
+
+    def total_saved(self) -> int:
+        return sum(entry["saved"] for entry in self._entries.values())
+
+
+def reencode_video(video_path: Path, expected_seconds: float, threads: int = REENCODE_THREADS) -> str:
+    """Re-encode a video with REENCODE_ARGS and replace it if the result checks out.
+
+    Returns "replaced", "skipped" (codec is already efficient), "larger" (the
+    original is kept) or "no-space" (the result might not fit on the disk next
+    to the original). Raises ValueError if the result's duration doesn't match
+    the catalog. The original's timestamps are kept, so it still counts as old.
+    """
+    global _reencode_reserved
+    if set(probe_codecs(video_path)) & REENCODE_SKIP_CODECS:
+        return "skipped"
+    stat = video_path.stat()
+    with _reencode_reserved_lock:
+        free = shutil.disk_usage(video_path.parent).free - _reencode_reserved
+        if free < stat.st_size + REENCODE_FREE_MARGIN:
+            return "no-space"
+        _reencode_reserved += stat.st_size
+    temp_path = video_path.with_name(f".{video_path.stem}.reencoding.mp4")
+    try:
+        subprocess.run(
+            low_priority([
+                "ffmpeg", "-y", "-v", "error", "-i", str(video_path), "-map", "0:v", "-map", "0:a?",
+                *REENCODE_ARGS, "-threads", str(threads), "-movflags", "+faststart", "-f", "mp4", str(temp_path),
+            ]),
+            check=True,
+            capture_output=True,
+        )
+        duration = probe_video_duration_seconds(temp_path)
+        if duration is None or abs(duration - expected_seconds) > REENCODE_DURATION_TOLERANCE:
+            raise ValueError(f"Dauer {format_duration(duration)} statt {format_duration(expected_seconds)}")
+        if temp_path.stat().st_size >= stat.st_size:
+            return "larger"
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, video_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+        with _reencode_reserved_lock:
+            _reencode_reserved -= stat.st_size
+    return "replaced"
+
+
+def normalize_for_comparison(name: str) -> str:
+    """Normalize a filename for comparison (handle umlauts, parentheses, etc)."""
+    name = name.lower()
+    # Replace umlauts
+    for char, replacement in [("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")]:
+        name = name.replace(char, replacement)
+    # Remove parentheses and clean up
+    name = name.replace("(", "").replace(")", "")
+    name = re.sub(r"-+", "-", name).strip("-")
+    return name
+
+
+class FileNameIndex:
+    """Index of video files by normalized name and by trigrams of that name.
+
+    Built in one pass over the directory listing, so looking up the files that
+    might belong to an episode doesn't require scanning all files again.
+    """
+
+    SUFFIX_PREFERENCE = (".mp4", ".webm")
+
+    def __init__(self, paths: list[Path]):
+        self._by_name: dict[str, list[Path]] = {}
+        self._by_trigram: dict[str, set[str]] = {}
+        self._trigram_counts: dict[str, int] = {}
+        for path in paths:
+            key = normalize_for_comparison(path.stem)
+            self._by_name.setdefault(key, []).append(path)
+            if key in self._trigram_counts:
+                continue
+            trigrams = self.trigrams(key)
+            self._trigram_counts[key] = len(trigrams)
+            for trigram in trigrams:
+                self._by_trigram.setdefault(trigram, set()).add(key)
+        for files in self._by_name.values():
+            files.sort(key=lambda p: self.SUFFIX_PREFERENCE.index(p.suffix) if p.suffix in self.SUFFIX_PREFERENCE else 99)
+
+    @staticmethod
+    def trigrams(name: str) -> set[str]:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def exact(self, stem: str) -> list[Path]:
+        """Files whose normalized name equals the normalized stem, .mp4 first."""
+        return self._by_name.get(normalize_for_comparison(stem), [])
+
+    def similar(self, stem: str, threshold: float = 0.6) -> list[tuple[float, Path]]:
+        """Files with a trigram similarity (Jaccard) of at least threshold, best first."""
+        trigrams = self.trigrams(normalize_for_comparison(stem))
+        shared: dict[str, int] = {}
+        for trigram in trigrams:
+            for key in self._by_trigram.get(trigram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        matches = []
+        for key, count in shared.items():
+            score = count / (len(trigrams) + self._trigram_counts[key] - count)
+            if score >= threshold:
+                matches.extend((score, path) for path in self._by_name[key])
+        return sorted(matches, key=lambda match: -match[0])
+
+
 @click.group()
-def cli():
+@click.option("--ytdlp-in-process", is_flag=True, help="yt-dlp im Prozess ausführen statt pro Folge neu zu starten (braucht das yt-dlp-Paket)")
+@click.option("--trace", type=click.Path(dir_okay=False), help="Zeiten der einzelnen Schritte als JSON Lines in diese Datei schreiben")
+@click.pass_context
+def cli(ctx: click.Context, ytdlp_in_process: bool, trace: str | None):
     """🐭 Sachgeschichten Downloader für wdrmaus.de 🐘"""
     SACHGESCHICHTEN_DIR.mkdir(exist_ok=True)
+    if ytdlp_in_process and not set_ytdlp_mode("inprocess"):
+        warn("yt-dlp-Paket nicht installiert, nutze das yt-dlp-Programm")
+    if trace:
+        TRACER.start(trace)
+    if TRACER.enabled:
+        ctx.call_on_close(print_trace_summary)
+
+
+def print_trace_summary():
+    header(f"Zeiten pro Schritt ({TRACER.path})")
+    for line in TRACER.summary():
+        click.echo(f"  {line}")
+    TRACER.close()
 
 
 @cli.command()
@@ -844,6 +1983,7 @@ def download():
     click.echo(click.style("  ║   'q' zum Beenden                     ║", fg=ORANGE))
     click.echo(click.style("  ╚═══════════════════════════════════════╝", fg=ORANGE))
 
+    repo = open_repository()
     while True:
         click.echo()
         url = click.prompt(
@@ -861,7 +2001,7 @@ def download():
             click.echo()
             break
 
-        process_url(url)
+        process_url(url, repo)
 
 
 def ask_presenter(title: str, year: str) -> str | None:
@@ -895,15 +2035,39 @@ def ask_presenter(title: str, year: str) -> str | None:
     return presenter
 
 
-def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: EpisodeRepository) -> bool:
-    """Process a single bulk URL. Returns True on success, False if cancelled."""
+def process_bulk_url(
+    url: str,
+    no_download: bool,
+    no_interactive: bool,
+    repo: EpisodeRepository,
+    jobs: int = 1,
+    crawl_state: CrawlState | None = None,
+    prefetched: Future | None = None,
+    fetch_jobs: int = 8,
+) -> bool:
+    """Process a single bulk URL. Returns True on success, False if cancelled.
+
+    With a crawl_state, pages that haven't changed since they were last fully
+    processed are skipped without parsing them. prefetched is a future for the
+    page content (None if unchanged) that the caller already started.
+    """
     info(f"Lese {url}")
 
     try:
-        available, missing_episodes = parse_bulk_page(url)
+        if prefetched is not None:
+            html = prefetched.result()
+        elif crawl_state:
+            html = crawl_state.fetch_if_changed(url)
+        else:
+            html = fetch_page_text(url)
+        if html is None:
+            info("Unverändert seit dem letzten Lauf, überspringe")
+            return True
+        available, missing_episodes = parse_bulk_html(html, url)
     except Exception as e:
         error(f"Fehler beim Einlesen: {e}")
         return True  # Continue with other URLs
+    failed = []
 
     success(f"Gefunden: {len(available)} verfügbar, {len(missing_episodes)} nicht verfügbar")
 
@@ -933,12 +2097,17 @@ def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: Ep
 
         # Update missing durations for already downloaded episodes
         updated_durations = 0
-        for downloaded_ep in repo.get_all_downloaded():
-            if not downloaded_ep.has_valid_duration() and downloaded_ep.find_video_path():
-                duration = get_video_duration(downloaded_ep.video_path)
-                if duration:
-                    downloaded_ep.duration = duration
-                    updated_durations += 1
+        without_duration = [
+            ep for ep in repo.get_all_downloaded()
+            if not ep.has_valid_duration() and ep.find_video_path()
+        ]
+        durations = get_video_durations([ep.video_path for ep in without_duration])
+        for downloaded_ep in without_duration:
+            duration = durations[downloaded_ep.video_path]
+            if duration:
+                downloaded_ep.duration = duration
+                repo.mark_dirty(downloaded_ep.slug)
+                updated_durations += 1
         if updated_durations:
             repo.save()
             success(f"Dauer für {updated_durations} Folgen ergänzt")
@@ -978,6 +2147,7 @@ def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: Ep
                         existing_ep = repo.get_by_url(ep["url"])
                         if existing_ep and existing_ep.is_downloaded:
                             existing_ep.presenter = presenter
+                            repo.mark_dirty(existing_ep.slug)
                             repo.save()
 
         if not to_download:
@@ -987,15 +2157,10 @@ def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: Ep
             info(f"Lade {len(to_download)} neue Folgen herunter: {titles}")
             click.echo()
 
-            downloaded_count = 0
-            failed = []
-
-            for ep in tqdm(to_download, desc="  🐭 Lädt", unit=" Folge"):
-                presenter = presenter_map.get(ep["title"].lower(), "")
-                if process_url_auto(ep["url"], presenter=presenter, repo=repo, original_year=ep["year"]):
-                    downloaded_count += 1
-                else:
-                    failed.append(ep)
+            failed = download_all(
+                to_download, presenter_map, repo, jobs=jobs, fetch_jobs=fetch_jobs
+            )
+            downloaded_count = len(to_download) - len(failed)
 
             click.echo()
             success(f"{downloaded_count}/{len(to_download)} Folgen heruntergeladen")
@@ -1009,6 +2174,9 @@ def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: Ep
                 repo.save()
                 warn(f"Fehlgeschlagen (zur Fehlt-Liste hinzugefügt): {', '.join(ep['title'] for ep in failed)}")
 
+    # Only skip this page next time if everything on it was handled
+    if crawl_state and not no_download and not failed:
+        crawl_state.mark_done(url)
     return True
 
 
@@ -1016,7 +2184,10 @@ def process_bulk_url(url: str, no_download: bool, no_interactive: bool, repo: Ep
 @click.argument("url")
 @click.option("--no-download", is_flag=True, help="Nicht herunterladen, nur Fehlt-Liste füllen")
 @click.option("--no-interactive", is_flag=True, help="Keine Rückfragen (Moderator wird nicht abgefragt)")
-def bulk(url: str, no_download: bool, no_interactive: bool):
+@click.option("--jobs", "-j", default=1, show_default=True, help="Anzahl paralleler Downloads")
+@click.option("--per-host", default=2, show_default=True, help="Maximale gleichzeitige Seitenabrufe pro Host (gilt auch für --fetch-jobs)")
+@click.option("--fetch-jobs", default=8, show_default=True, help="Maximale gleichzeitige Seitenabrufe (Buchstaben und Metadaten)")
+def bulk(url: str, no_download: bool, no_interactive: bool, jobs: int, per_host: int, fetch_jobs: int):
     """Massen-Import: A-Z Seite einlesen, fehlende Liste füllen, verfügbare herunterladen."""
     click.echo()
     click.echo(click.style("  ╔═══════════════════════════════════════╗", fg=ORANGE))
@@ -1024,13 +2195,16 @@ def bulk(url: str, no_download: bool, no_interactive: bool):
     click.echo(click.style("  ╚═══════════════════════════════════════╝", fg=ORANGE))
     click.echo()
 
-    repo = EpisodeRepository()
+    repo = open_repository()
+    PAGE_LIMITER.set_limit(per_host)
 
-    if not process_bulk_url(url, no_download, no_interactive, repo):
+    if not process_bulk_url(
+        url, no_download, no_interactive, repo, jobs=jobs, fetch_jobs=fetch_jobs
+    ):
         return
 
     # Update index at the end
-    repo.save()
+    IMAGE_PIPELINE.wait()
     update_index(repo)
     success("index.md aktualisiert")
 
@@ -1042,7 +2216,11 @@ def bulk(url: str, no_download: bool, no_interactive: bool):
 @cli.command()
 @click.option("--no-download", is_flag=True, help="Nicht herunterladen, nur Fehlt-Liste füllen")
 @click.option("--no-interactive", is_flag=True, help="Keine Rückfragen (Moderator wird nicht abgefragt)")
-def all(no_download: bool, no_interactive: bool):
+@click.option("--jobs", "-j", default=1, show_default=True, help="Anzahl paralleler Downloads")
+@click.option("--per-host", default=2, show_default=True, help="Maximale gleichzeitige Seitenabrufe pro Host (gilt auch für --fetch-jobs)")
+@click.option("--fetch-jobs", default=8, show_default=True, help="Maximale gleichzeitige Seitenabrufe (Buchstaben und Metadaten)")
+@click.option("--force", is_flag=True, help="Auch unveränderte Buchstaben-Seiten neu einlesen")
+def all(no_download: bool, no_interactive: bool, jobs: int, per_host: int, fetch_jobs: int, force: bool):
     """Alle Buchstaben: A-Z Seite laden und alle Buchstaben-Filter durchgehen."""
     click.echo()
     click.echo(click.style("  ╔═══════════════════════════════════════╗", fg=ORANGE))
@@ -1051,7 +2229,9 @@ def all(no_download: bool, no_interactive: bool):
     click.echo()
 
     base_url = "https://www.wdrmaus.de/filme/sachgeschichten/a-bis-z.php5"
-    repo = EpisodeRepository()
+    repo = open_repository()
+    crawl_state = None if force else CrawlState()
+    PAGE_LIMITER.set_limit(per_host)
 
     info(f"Lese Filter-Buchstaben von {base_url}")
 
@@ -1064,19 +2244,28 @@ def all(no_download: bool, no_interactive: bool):
     success(f"Gefunden: {len(filter_urls)} Filter (Buchstaben/Zahlen)")
     click.echo()
 
+    # Fetch all filter pages up front, they are processed in order as they arrive
+    fetcher = ThreadPoolExecutor(max_workers=max(1, fetch_jobs))
+    fetch_page = crawl_state.fetch_if_changed if crawl_state else fetch_page_text
+    pages = {filter_url: fetcher.submit(fetch_page, filter_url) for filter_url in filter_urls}
+
     for i, filter_url in enumerate(filter_urls, 1):
         # Extract filter letter for display
         filter_char = filter_url.split("filter=")[-1].upper()
         header(f"[{i}/{len(filter_urls)}] Buchstabe: {filter_char}")
 
-        if not process_bulk_url(filter_url, no_download, no_interactive, repo):
+        if not process_bulk_url(
+            filter_url, no_download, no_interactive, repo, jobs=jobs,
+            crawl_state=crawl_state, prefetched=pages[filter_url], fetch_jobs=fetch_jobs,
+        ):
             warn("Abgebrochen")
             break
 
         click.echo()
+    fetcher.shutdown(cancel_futures=True)
 
     # Update index at the end
-    repo.save()
+    IMAGE_PIPELINE.wait()
     update_index(repo)
     success("index.md aktualisiert")
 
@@ -1094,7 +2283,7 @@ def findall():
     click.echo(click.style("  ╚═══════════════════════════════════════╝", fg=ORANGE))
     click.echo()
 
-    repo = EpisodeRepository()
+    repo = open_repository()
     all_missing = repo.get_all_missing()
 
     # Filter out permanently skipped episodes
@@ -1115,18 +2304,25 @@ def findall():
     downloaded_count = 0
     skipped_count = 0
 
-    for i, episode in enumerate(sorted(missing, key=lambda x: x.title.lower()), 1):
+    missing.sort(key=lambda x: x.title.lower())
+    queries = [f"sendung mit der maus {episode.title}" for episode in missing]
+    search_cache = SearchCache()
+
+    for i, episode in enumerate(missing, 1):
         header(f"[{i}/{len(missing)}] {episode.title} ({episode.year})")
 
-        # Search YouTube first
-        query = f"sendung mit der maus {episode.title}"
+        # Search YouTube first, and the next episodes in the background while the user decides
+        query = queries[i - 1]
         info(f"Suche: {query}")
+        for upcoming in queries[i - 1:i + SEARCH_PREFETCH]:
+            search_cache.prefetch(upcoming)
 
-        results = search_youtube(query, max_results=5)
+        results = search_cache.get(query)
 
         if not results:
             warn("Keine Ergebnisse gefunden - wird übersprungen")
             episode.skip = True
+            repo.mark_dirty(episode.slug)
             repo.save()
             skipped_count += 1
             continue
@@ -1159,6 +2355,7 @@ def findall():
 
         if answer["selection"] == "skip_forever":
             episode.skip = True
+            repo.mark_dirty(episode.slug)
             repo.save()
             info("Wird in Zukunft übersprungen")
             skipped_count += 1
@@ -1201,14 +2398,13 @@ def findall():
                 break
             presenter = presenter_result
             episode.presenter = presenter
+            repo.mark_dirty(episode.slug)
             repo.save()
 
         # Download with yt-dlp
         try:
-            subprocess.run(
-                ["yt-dlp", "--merge-output-format", "mp4", "-o", str(episode.video_path), download_url],
-                check=True,
-            )
+            ytdlp_download(download_url, episode.video_path, merge_output_format="mp4")
+            VIDEO_DIRECTORY.add(episode.video_path)
             duration = get_video_duration(episode.video_path)
 
             # Download thumbnail if available
@@ -1228,6 +2424,7 @@ def findall():
 
             success(f"Heruntergeladen: {episode.video_path.name} ({duration})")
             downloaded_count += 1
+            INDEX_RENDERER.episode_done(repo)
 
         except subprocess.CalledProcessError as e:
             error(f"Download fehlgeschlagen: {e}")
@@ -1235,6 +2432,8 @@ def findall():
 
         click.echo()
 
+    search_cache.close()
+
     # Final update
     update_index(repo)
     success("index.md aktualisiert")
@@ -1258,27 +2457,25 @@ def cleanup(apply: bool):
         info("Vorschau-Modus (--apply zum Ausführen)")
         click.echo()
 
-    repo = EpisodeRepository()
+    repo = open_repository()
 
     # Check for files with incorrect names (old naming scheme, webm files)
     header("Prüfe: Dateien mit falschem Namen")
     files_to_rename = []  # (old_path, new_path, episode_or_none, is_webm_conversion)
 
-    # First: find all .webm files that need conversion to .mp4
-    for f in list(SACHGESCHICHTEN_DIR.glob("*.webm")) + list(SACHGESCHICHTEN_DIR.glob("*.mp4.webm")):
-        mp4_path = f.with_name(f.name.replace(".mp4.webm", ".mp4").replace(".webm", ".mp4"))
-        files_to_rename.append((f, mp4_path, None, True))
-
-    def normalize_for_comparison(name: str) -> str:
-        """Normalize a filename for comparison (handle umlauts, parentheses, etc)."""
-        name = name.lower()
-        # Replace umlauts
-        for char, replacement in [("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")]:
-            name = name.replace(char, replacement)
-        # Remove parentheses and clean up
-        name = name.replace("(", "").replace(")", "")
-        name = re.sub(r"-+", "-", name).strip("-")
-        return name
+    # One directory listing for all checks below
+    VIDEO_DIRECTORY.refresh()
+    video_files = [
+        SACHGESCHICHTEN_DIR / name for name in sorted(VIDEO_DIRECTORY.names)
+        if name.endswith((".mp4", ".webm"))
+    ]
+    file_index = FileNameIndex(video_files)
+
+    # First: find all .webm files (incl. .mp4.webm) that need conversion to .mp4
+    for f in video_files:
+        if f.suffix == ".webm":
+            mp4_path = f.with_name(f.name.replace(".mp4.webm", ".mp4").replace(".webm", ".mp4"))
+            files_to_rename.append((f, mp4_path, None, True))
 
     # Then: find files with incorrect names (umlauts, etc.)
     for episode in repo.get_all_downloaded():
@@ -1286,25 +2483,26 @@ def cleanup(apply: bool):
         expected_image = episode.image_path
 
         # Skip if expected file already exists
-        if expected_video.exists():
+        if VIDEO_DIRECTORY.exists(expected_video):
             continue
 
         # Look for files that might have the old naming scheme
-        expected_normalized = normalize_for_comparison(expected_video.stem)
-
-        for existing_file in list(SACHGESCHICHTEN_DIR.glob("*.mp4")) + list(SACHGESCHICHTEN_DIR.glob("*.webm")):
-            existing_normalized = normalize_for_comparison(existing_file.stem)
-
-            if existing_normalized == expected_normalized:
-                # Only add if actually needs renaming
-                if existing_file != expected_video:
-                    is_webm = existing_file.suffix == ".webm"
-                    files_to_rename.append((existing_file, expected_video, episode, is_webm))
-                # Also check for corresponding webp
-                existing_webp = existing_file.with_suffix(".webp")
-                if existing_webp.exists() and existing_webp != expected_image:
-                    files_to_rename.append((existing_webp, expected_image, episode, False))
-                break
+        for existing_file in file_index.exact(expected_video.stem)[:1]:
+            # Only add if actually needs renaming
+            if existing_file != expected_video:
+                is_webm = existing_file.suffix == ".webm"
+                files_to_rename.append((existing_file, expected_video, episode, is_webm))
+            # Also check for corresponding webp
+            existing_webp = existing_file.with_suffix(".webp")
+            if VIDEO_DIRECTORY.exists(existing_webp) and existing_webp != expected_image:
+                files_to_rename.append((existing_webp, expected_image, episode, False))
+
+    # An old-scheme .webm is found by both passes, convert it only once to the episode's name
+    by_source = {}
+    for entry in files_to_rename:
+        if entry[2] or entry[0] not in by_source:
+            by_source[entry[0]] = entry
+    files_to_rename = list(by_source.values())
 
     if not files_to_rename:
         success("Alle Dateien haben korrekte Namen")
@@ -1318,24 +2516,19 @@ def cleanup(apply: bool):
         info(f"{len(files_to_rename)} Dateien zum Umbenennen gefunden")
 
         if apply:
+            conversions = []
+            renamed = 0
             for old_path, new_path, episode, is_webm in files_to_rename:
                 if is_webm:
-                    # Convert webm to mp4 using ffmpeg
-                    try:
-                        subprocess.run(
-                            ["ffmpeg", "-i", str(old_path), "-c", "copy", str(new_path)],
-                            check=True,
-                            capture_output=True,
-                        )
-                        old_path.unlink()
-                    except subprocess.CalledProcessError as e:
-                        error(f"Konvertierung fehlgeschlagen: {old_path.name}")
-                        if e.stderr:
-                            click.echo(f"    {e.stderr.decode()[-200:]}")
-                        continue
+                    conversions.append((old_path, new_path))
                 else:
                     old_path.rename(new_path)
-            success(f"{len(files_to_rename)} Dateien umbenannt/konvertiert")
+                    renamed += 1
+            converted = convert_all_to_mp4(conversions) if conversions else 0
+            VIDEO_DIRECTORY.refresh()
+            success(f"{renamed} Dateien umbenannt, {converted} konvertiert")
+            if converted < len(conversions):
+                warn(f"{len(conversions) - converted} Konvertierungen fehlgeschlagen")
             click.echo()
             info("Bitte erneut ausführen, um weitere Prüfungen durchzuführen.")
             click.echo()
@@ -1358,6 +2551,8 @@ def cleanup(apply: bool):
                 continue
             missing_files.append(episode)
             warn(f"{episode.title} ({episode.year}) -> {episode.video_path.name}")
+            for score, similar_file in file_index.similar(episode.video_path.stem)[:1]:
+                info(f"    Ähnliche Datei ({score:.0%}): {similar_file.name}")
 
     if not missing_files:
         success("Alle Einträge haben Dateien auf Disk")
@@ -1367,7 +2562,7 @@ def cleanup(apply: bool):
         if apply:
             for episode in missing_files:
                 # Remove from downloaded first, then add to missing
-                repo._downloaded.pop(episode.slug, None)
+                repo.remove_from_downloaded(episode.slug)
                 repo.add_to_missing(episode)
             repo.save()
             update_index(repo)
@@ -1387,12 +2582,13 @@ def cleanup(apply: bool):
         info(f"{len(missing_duration)} Einträge ohne Dauer gefunden")
 
         if apply:
+            video_files = {episode.slug: episode.find_video_path() for episode in missing_duration}
+            durations = get_video_durations([f for f in video_files.values() if f])
             for episode in missing_duration:
-                video_file = episode.find_video_path()
-                if video_file:
-                    duration = get_video_duration(video_file)
-                    if duration:
-                        episode.duration = duration
+                video_file = video_files[episode.slug]
+                if video_file and durations[video_file]:
+                    episode.duration = durations[video_file]
+                    repo.mark_dirty(episode.slug)
             repo.save()
             update_index(repo)
             success(f"Dauer für {len(missing_duration)} Einträge ergänzt")
@@ -1419,6 +2615,7 @@ def cleanup(apply: bool):
                     break
                 if presenter:  # Not skipped
                     episode.presenter = presenter
+                    repo.mark_dirty(episode.slug)
                     updated_count += 1
                     repo.save()  # Save after each to preserve progress
             if updated_count:
@@ -1459,5 +2656,178 @@ def cleanup(apply: bool):
     click.echo()
 
 
+@cli.command()
+@click.option("--apply", is_flag=True, help="Tatsächlich neu kodieren (ohne: nur Vorschau)")
+@click.option("--max-cores", default=max(1, (os.cpu_count() or 2) // 2), show_default=True, help="Höchstens so viele CPU-Kerne nutzen")
+@click.option("--older-than", default=30, show_default=True, help="Nur Dateien, die älter als so viele Tage sind")
+@click.option("--limit", default=0, help="Höchstens so viele Dateien bearbeiten (0: alle)")
+def reencode(apply: bool, max_cores: int, older_than: int, limit: int):
+    """Wartung: Alte Downloads platzsparend als H.265 neu kodieren (mit niedriger Priorität)."""
+    repo = open_repository()
+    state = ReencodeState()
+    cutoff = time.time() - older_than * 24 * 3600
+
+    header("Suche alte Downloads")
+    candidates = []
+    without_duration = 0
+    for episode in repo.get_all_downloaded():
+        video_path = episode.find_video_path()
+        if not video_path or video_path.suffix != ".mp4" or state.is_done(video_path):
+            continue
+        expected = parse_duration(episode.duration)
+        if expected is None:
+            # Without a catalog duration the result can't be verified
+            without_duration += 1
+            continue
+        mtime = video_path.stat().st_mtime
+        if mtime < cutoff:
+            candidates.append((mtime, video_path, expected))
+    candidates.sort()
+    if limit:
+        candidates = candidates[:limit]
+
+    total_size = sum(path.stat().st_size for _, path, _ in candidates)
+    info(f"{len(candidates)} Dateien ({total_size / 1024**3:.1f} GB) zum Neukodieren")
+    if without_duration:
+        warn(f"{without_duration} Dateien ohne Dauer im Katalog übersprungen (siehe cleanup)")
+    if not apply:
+        if candidates:
+            info("Führe mit --apply aus, um neu zu kodieren")
+        return
+
+    threads = min(REENCODE_THREADS, max_cores)
+    jobs = max(1, max_cores // threads)
+    saved = 0
+    no_space = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(reencode_video, path, expected, threads): (path, path.stat().st_size)
+            for _, path, expected in candidates
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="  🐭 Kodiert", unit=" Datei"):
+            video_path, size_before = futures[future]
+            try:
+                status = future.result()
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                error(f"Neukodierung fehlgeschlagen: {video_path.name} ({e})")
+                continue
+            if status == "no-space":
+                # Not recorded, so the file is tried again on the next run
+                no_space += 1
+                continue
+            state.record(video_path, size_before, status)
+            if status == "replaced":
+                file_saved = size_before - video_path.stat().st_size
+                saved += file_saved
+                success(f"{video_path.name}: {file_saved / 1024**2:.0f} MB gespart")
+            elif status == "larger":
+                info(f"{video_path.name}: nicht kleiner, Original behalten")
+
+    if no_space:
+        warn(f"{no_space} Dateien wegen zu wenig freiem Speicherplatz übersprungen")
+    success(f"{saved / 1024**3:.2f} GB gespart (insgesamt {state.total_saved() / 1024**3:.2f} GB)")
+
+
+@cli.command()
+@click.option("--threshold", default=8, show_default=True, help="Erlaubte abweichende Bits pro Einzelbild (von 64)")
+@click.option("--jobs", "-j", default=os.cpu_count() or 1, show_default=True, help="Anzahl paralleler ffmpeg-Prozesse")
+def dedupe(threshold: int, jobs: int):
+    """Doppelte Videos finden (gleiche Sachgeschichte unter anderem Titel oder Jahr)."""
+    if numpy is None:
+        error("NumPy ist nicht installiert (pip install numpy)")
+        return
+
+    repo = open_repository()
+    episodes_by_path = {}
+    for episode in repo.get_all_downloaded():
+        video_path = episode.find_video_path()
+        if video_path:
+            episodes_by_path[video_path] = episode
+    video_files = sorted(
+        SACHGESCHICHTEN_DIR / name for name in VIDEO_DIRECTORY.names if Path(name).suffix in Episode.VIDEO_EXTENSIONS
+    )
+
+    header(f"Berechne Bild-Hashes für {len(video_files)} Videos")
+    durations = get_video_durations_seconds(video_files)
+    cache = FrameHashCache()
+    frame_hashes = {}
+    to_hash = []
+    for video_path in video_files:
+        if not durations[video_path]:
+            continue
+        cached = cache.lookup(video_path)
+        if cached is None:
+            to_hash.append(video_path)
+        else:
+            frame_hashes[video_path] = cached
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            futures = {executor.submit(sample_frame_hashes, path, durations[path]): path for path in to_hash}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="  🐭 Hasht", unit=" Video"):
+                video_path = futures[future]
+                frame_hashes[video_path] = future.result()
+                cache.store(video_path, frame_hashes[video_path])
+        cache.save()
+
+    # One signature per video: the frame hashes side by side, so Hamming distances add up
+    signatures = {}
+    for video_path, hashes in frame_hashes.items():
+        if None in hashes:
+            continue
+        signature = 0
+        for frame_hash in hashes:
+            signature = (signature << 64) | frame_hash
+        signatures[video_path] = (signature, durations[video_path])
+    unusable = len(video_files) - len(signatures)
+    if unusable:
+        warn(f"{unusable} Videos ohne verwertbare Einzelbilder übersprungen")
+
+    groups = find_duplicate_groups(signatures, threshold)
+    if not groups:
+        success("Keine Duplikate gefunden")
+        return
+
+    reclaimable = 0
+    for group in groups:
+        sizes = {path: path.stat().st_size for path in group}
+        reclaimable += sum(sizes.values()) - max(sizes.values())
+        header(f"{len(group)} gleiche Videos")
+        for video_path in group:
+            episode = episodes_by_path.get(video_path)
+            entry = f"{episode.title} ({episode.year})" if episode else "nicht im Katalog"
+            info(f"{video_path.name} [{format_duration(durations[video_path])}, {sizes[video_path] / 1024**2:.0f} MB]: {entry}")
+    click.echo()
+    success(f"{len(groups)} Gruppen, bis zu {reclaimable / 1024**3:.2f} GB freizugeben")
+
+
+@cli.command()
+@click.option("--diff", is_flag=True, help="Nur die Änderungen seit der letzten vollständigen Liste laden")
+def filmliste(diff: bool):
+    """MediathekView-Filmliste lokal spiegeln (für schnelle Suchen ohne API)."""
+    info("Lade MediathekView-Filmliste" + (" (Diff)" if diff else ""))
+    count = get_film_list().update(diff=diff)
+    success(f"{count} Filme in die lokale Filmliste geladen")
+
+
+@cli.command("db-import")
+def db_import():
+    """SQLite: JSON-Dateien in sachgeschichten.db importieren (danach wird die DB verwendet)."""
+    repo = EpisodeRepository(storage=JsonStorage())
+    repo.save_to(SqliteStorage())
+    success(f"{len(repo.get_all_downloaded())} Folgen und {len(repo.get_all_missing())} fehlende "
+            f"Folgen nach {DB_FILE.name} importiert")
+
+
+@cli.command("db-export")
+def db_export():
+    """SQLite: sachgeschichten.db als JSON-Dateien exportieren."""
+    if not DB_FILE.exists():
+        error(f"{DB_FILE.name} existiert nicht, bitte zuerst db-import ausführen")
+        return
+    repo = EpisodeRepository(storage=SqliteStorage())
+    repo.save_to(JsonStorage())
+    success(f"{JSON_FILE.name} und {MISSING_FILE.name} exportiert")
+
+
 if __name__ == "__main__":
     cli()
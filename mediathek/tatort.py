@@ -8,6 +8,7 @@
 #     "openpyxl",
 # ]
 # ///
+import bisect
 import csv
 import os
 import re
@@ -20,12 +21,13 @@ import inquirer
 import requests
 from openpyxl import load_workbook
 
-from lib import search_mediathekviewweb, download_mediathek_video
+from lib import TRACER, download_mediathek_video, get_film_list, iter_mediathekviewweb, ytdlp_download, ytdlp_in_process
 
 CWD = Path(os.getcwd())
 CSV_PATH = Path(__file__).parent / "episodes.csv"
 SPREADSHEET_PATH = "/home/rixx/lib/movies/tatort.xlsx"
 EPISODES = []
+SLUG_INDEX = None  # SlugIndex over EPISODES, built by load_csv
 KNOWN_BAD = (
     # kein tatort
     "die-professorin-tatort-ölfeld",
@@ -42,6 +44,8 @@ OFFSET = int(os.environ.get("OFFSET") or 0)
 
 
 def check_youtube_dl():
+    if ytdlp_in_process():
+        return
     try:
         subprocess.check_output(["yt-dlp", "--version"])
     except FileNotFoundError:
@@ -100,7 +104,45 @@ def slugify(s):
     return re.sub(r"[\W_]+", "-", s.lower()).strip("-")
 
 
+class SlugIndex:
+    """Sorted slugs and a prefix trie over an episode list.
+
+    Entries whose slug starts with a given slug are a contiguous range of the
+    sorted slugs, and entries whose slug is a prefix of it lie on the trie path
+    of that slug, so both directions cost O(len(slug) + matches).
+    """
+
+    def __init__(self, episodes):
+        self.episodes = episodes
+        ordered = sorted((entry["slug"], i) for i, entry in enumerate(episodes))
+        self._slugs = [slug for slug, _ in ordered]
+        self._positions = [i for _, i in ordered]
+        self._trie = {}
+        for i, entry in enumerate(episodes):
+            node = self._trie
+            for char in entry["slug"]:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(i)
+
+    def prefix_matches(self, slug):
+        """Return the episodes whose slug starts with slug or is a prefix of it, in list order."""
+        found = set()
+        position = bisect.bisect_left(self._slugs, slug)
+        while position < len(self._slugs) and self._slugs[position].startswith(slug):
+            found.add(self._positions[position])
+            position += 1
+        node = self._trie
+        found.update(node.get(None, ()))
+        for char in slug:
+            node = node.get(char)
+            if node is None:
+                break
+            found.update(node.get(None, ()))
+        return [self.episodes[i] for i in sorted(found)]
+
+
 def load_csv():
+    global SLUG_INDEX
     if not CSV_PATH.exists():
         update_csv()
     with open(CSV_PATH, "r") as fp:
@@ -108,9 +150,17 @@ def load_csv():
         data = list(reader)
     for entry in data:
         entry["slug"] = slugify(entry["titel"])
+    SLUG_INDEX = SlugIndex(data)
     return data
 
 
+def find_by_slug_prefix(slug):
+    global SLUG_INDEX
+    if SLUG_INDEX is None or SLUG_INDEX.episodes is not EPISODES:
+        SLUG_INDEX = SlugIndex(EPISODES)
+    return SLUG_INDEX.prefix_matches(slug)
+
+
 def normalize_title(title):
     trailing = ("(", "ARD", "Mediathek", "–")  # not a -, a –
     leading = ("Tatort:", "Wunschtatort", "Tatort Konstanz:", "Tatort -")
@@ -128,9 +178,7 @@ def get_episode_by_title(title, include_existing=True, noinput=False):
     slug = slugify(title)
     if slug in KNOWN_BAD:
         return
-    matches = [
-        e for e in EPISODES if e["slug"].startswith(slug) or slug.startswith(e["slug"])
-    ]
+    matches = find_by_slug_prefix(slug)
     if not matches:
         if "ß" in slug:
             slug = slug.replace("ß", "ss")
@@ -138,11 +186,7 @@ def get_episode_by_title(title, include_existing=True, noinput=False):
             slug = slug.replace("ss", "ß")
         elif "chateau" in slug:
             slug = slug.replace("chateau", "château")
-        matches = [
-            e
-            for e in EPISODES
-            if e["slug"].startswith(slug) or slug.startswith(e["slug"])
-        ]
+        matches = find_by_slug_prefix(slug)
         if not matches:
             print(f"Episode '{title}' not found!")
             return
@@ -215,7 +259,11 @@ def handle_download(url, title=None):
         return
     filename = get_episode_filename(episode)
     print(f"Downloading episode {episode['episode']}: {episode['titel']} to {filename}")
-    subprocess.call(["yt-dlp", "-o", filename, url])
+    try:
+        ytdlp_download(url, filename)
+    except subprocess.CalledProcessError:
+        print(f"Failed to download {episode['titel']}")
+        return
     subprocess.call(["notify-send", f"Finished downloading {episode['titel']}"])
 
 
@@ -236,46 +284,46 @@ def download():
 
 def bulk_download(noinput=False):
     print("Welcome to the Tatort bulk downloader.")
-    global EPISODES, OFFSET
+    global EPISODES
     EPISODES = load_csv()
-    size = 10
     blocklist = ["klare Sprache", "Audiodeskription"]
     seen = set()
-    while True:
-        results = search_mediathekviewweb(
-            topic="tatort",
-            min_duration=4800,
-            max_results=size,
-            offset=OFFSET,
-            blocklist=blocklist,
+
+    def on_page(offset, count):
+        global OFFSET
+        OFFSET = offset
+        print(f"Got {count} results at offset {offset}")
+
+    results = iter_mediathekviewweb(
+        topic="tatort",
+        min_duration=4800,
+        offset=OFFSET,
+        blocklist=blocklist,
+        on_page=on_page,
+    )
+    for result in results:
+        title = result.title
+        if title in seen:
+            continue
+        seen.add(title)
+        episode = get_episode_by_title(
+            title, include_existing=False, noinput=noinput
         )
-        print(f"Got {len(results)} results at offset {OFFSET}")
-        if not results:
-            break
-        for result in results:
-            title = result.title
-            if title in seen:
-                continue
-            seen.add(title)
-            episode = get_episode_by_title(
-                title, include_existing=False, noinput=noinput
-            )
-            if not episode:
-                continue
-            filename = Path(get_episode_filename(episode))
-            if filename.exists():
-                continue
+        if not episode:
+            continue
+        filename = Path(get_episode_filename(episode))
+        if filename.exists():
+            continue
+        print(
+            f"Downloading {episode['episode']} – {episode['titel']} to {filename}"
+        )
+        download_result = download_mediathek_video(result, filename)
+        if download_result.success:
+            subprocess.call(["notify-send", f"Finished downloading {episode['titel']}"])
+        else:
             print(
-                f"Downloading {episode['episode']} – {episode['titel']} to {filename}"
+                f"Download failed for {episode['episode']} – {episode['titel']}: {download_result.error}"
             )
-            download_result = download_mediathek_video(result, filename)
-            if download_result.success:
-                subprocess.call(["notify-send", f"Finished downloading {episode['titel']}"])
-            else:
-                print(
-                    f"Download failed for {episode['episode']} – {episode['titel']}: {download_result.error}"
-                )
-        OFFSET += size
 
 
 def get_available_episodes():
@@ -330,7 +378,16 @@ if __name__ == "__main__":
                 OFFSET += 1
     elif arg == "watch":
         watch()
+    elif arg == "update_filmlist":
+        count = get_film_list().update(diff="--diff" in sys.argv)
+        print(f"{count} Filme in die lokale Filmliste geladen")
     else:
         print(
-            "Call script with 'update_csv', 'download' (with a link or without to enter interactive mode), 'bulk [--noinput]' or 'watch'"
+            "Call script with 'update_csv', 'download' (with a link or without to enter interactive mode), "
+            "'bulk [--noinput]', 'watch' or 'update_filmlist [--diff]'. "
+            "Set MEDIATHEK_TRACE=<file> to record timings."
         )
+    if TRACER.enabled:
+        print()
+        print("\n".join(TRACER.summary()))
+        TRACER.close()
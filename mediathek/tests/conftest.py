@@ -0,0 +1,122 @@
+"""Offline tests and benchmarks for maus.py, tatort.py and lib.py.
+
+Run from the repository root with `just mediathek-bench`, which adds pytest,
+pytest-benchmark and the script dependencies of maus.py and tatort.py.
+Everything runs against the recorded pages in fixtures/, generated inputs from
+synthetic.py and a local HTTP server, so no test touches the network or the
+real data files next to maus.py. Compare runs with
+`just mediathek-bench --benchmark-autosave` and `--benchmark-compare`.
+"""
+
+import http.server
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import maus  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+INDEX_TEMPLATE = "# Sachgeschichten\n\n<!-- Beginn Sachgeschichtenindex -->\n\n<!-- Ende Sachgeschichtenindex -->\n"
+# maus.py data files that tests redirect into a temporary directory
+MAUS_DATA_FILES = (
+    "JSON_FILE", "MISSING_FILE", "JOURNAL_FILE", "DB_FILE", "CRAWL_STATE_FILE", "SEARCH_CACHE_FILE",
+    "IMAGE_HASH_FILE", "INDEX_FILE", "FRAME_HASH_FILE", "REENCODE_STATE_FILE",
+)
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+class LocalServer:
+    """Serves registered pages from 127.0.0.1, a stand-in for wdrmaus.de and the video CDN."""
+
+    def __init__(self):
+        self.pages: dict[str, bytes] = {}
+        self.requests: list[str] = []
+        self.ranges: list[str] = []  # Range headers of the GET requests, in order
+        self.fail_ranges: set[str] = set()  # Answer these ranges with a 500 once
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def do_GET(self):
+                server.requests.append(self.path)
+                self._respond(send_body=True)
+
+            def _respond(self, send_body: bool):
+                body = server.pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                status = 200
+                byte_range = self.headers.get("Range")
+                if byte_range and send_body:
+                    server.ranges.append(byte_range)
+                    if byte_range in server.fail_ranges:
+                        server.fail_ranges.discard(byte_range)
+                        self.send_error(500)
+                        return
+                    start, end = map(int, byte_range.removeprefix("bytes=").split("-"))
+                    body = body[start:end + 1]
+                    status = 206
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def add(self, path: str, body: str | bytes) -> str:
+        """Serve body at path (including the query string) and return its URL."""
+        self.pages[path] = body.encode() if isinstance(body, str) else body
+        return self.url(path)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}{path}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(scope="session")
+def _server():
+    server = LocalServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def http_server(_server):
+    yield _server
+    _server.pages.clear()
+    _server.requests.clear()
+    _server.ranges.clear()
+    _server.fail_ranges.clear()
+
+
+@pytest.fixture
+def maus_data(tmp_path, monkeypatch):
+    """Point maus.py's data files and video directory at an empty temporary directory."""
+    for name in MAUS_DATA_FILES:
+        monkeypatch.setattr(maus, name, tmp_path / getattr(maus, name).name)
+    monkeypatch.setattr(maus, "SACHGESCHICHTEN_DIR", tmp_path / "sachgeschichten")
+    maus.SACHGESCHICHTEN_DIR.mkdir()
+    monkeypatch.setattr(maus, "VIDEO_DIRECTORY", maus.VideoDirectory())
+    monkeypatch.setattr(maus, "INDEX_RENDERER", maus.IndexRenderer())
+    maus.INDEX_FILE.write_text(INDEX_TEMPLATE)
+    return tmp_path
@@ -0,0 +1,108 @@
+"""Generated inputs for the benchmarks, in the shape of the recorded fixtures."""
+
+import random
+import struct
+
+WORDS = ["Brot", "Züge", "Käse", "Wasser", "Schiff", "Maus", "Elefant", "Bagger", "Honig", "Straße", "Öl", "Kran"]
+
+
+def episode_titles(count: int, seed: int = 1) -> list[tuple[str, str]]:
+    """(title, year) pairs with umlauts and repeated words, like the real catalog."""
+    rng = random.Random(seed)
+    return [
+        (f"{rng.choice(WORDS)} und {rng.choice(WORDS)} {i}", str(rng.randint(1971, 2024)))
+        for i in range(count)
+    ]
+
+
+def az_page(count: int = 5000, available_share: float = 0.7, seed: int = 1) -> str:
+    """An A-Z list page like fixtures/a-bis-z.html with count entries."""
+    rng = random.Random(seed)
+    items = []
+    for i, (title, year) in enumerate(episode_titles(count, seed)):
+        if rng.random() < available_share:
+            items.append(
+                f'<li><a class="intern" href="../../filme/sachgeschichten/sg_{i}.php5" title="{title}">'
+                f'<span class="abiszTitel">{title} <span class="abiszJahr">({year})</span></span></a></li>'
+            )
+        else:
+            items.append(
+                f'<li><span><span class="abiszTitel">{title} <span class="abiszJahr">({year})</span></span></span></li>'
+            )
+    letters = "\n".join(
+        f'<li><a href="../../filme/sachgeschichten/a-bis-z.php5?filter={c}">{c.upper()}</a></li>'
+        for c in "abcdefghijklmnopqrstuvw"
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="de">\n<head>\n<meta charset="utf-8">\n'
+        + '<script src="/resources/js/plugin.js"></script>\n' * 50
+        + f'</head>\n<body>\n<ul class="filterbuchstaben">\n{letters}\n</ul>\n'
+        + '<div class="abiszAusgabe">\n<ul>\n' + "\n".join(items) + "\n</ul>\n</div>\n</body>\n</html>\n"
+    )
+
+
+def episode_page(description_quotes: int = 40) -> str:
+    """An episode page with a long JSON-LD description full of unescaped quotes."""
+    description = " ".join(f'Armin fragt "Wie geht das {i}?" und die Maus nickt.' for i in range(description_quotes))
+    ld = (
+        '{"@context": "https://schema.org", "@type": "VideoObject", "name": "Schülerzeitung", '
+        f'"description": "{description}", "datePublished": "2010-03-14", '
+        '"image": {"url": "https://www.wdrmaus.de/bilder/x.jpg"}, "publisher": {"name": "WDR"}}'
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="de">\n<head>\n' + '<meta name="x" content="y">\n' * 200
+        + f'<script type="application/ld+json">\n{ld}\n</script>\n</head>\n<body>\n'
+        + "<p>Inhalt</p>\n" * 2000 + "</body>\n</html>\n"
+    )
+
+
+def catalog(count: int = 10_000, seed: int = 1) -> list[dict]:
+    """sachgeschichten.json entries; every @id uses the legacy //filme form of its URL."""
+    entries = []
+    for i, (title, year) in enumerate(episode_titles(count, seed)):
+        url = f"https://www.wdrmaus.de/filme/sachgeschichten/sg_{i}.php5"
+        entries.append({
+            "name": title,
+            "originalYear": year,
+            "presenter": "Armin" if i % 3 else "",
+            "duration": "8:12",
+            "url": url,
+            "@id": url.replace("/filme", "//filme"),
+        })
+    return entries
+
+
+def _mp4_box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mp4_file(seconds: float, timescale: int = 90_000, version: int = 0, padding: int = 64 * 1024) -> bytes:
+    """A minimal MP4 with ftyp, mdat and a trailing moov/mvhd, like a file from a plain ffmpeg mux."""
+    duration = round(seconds * timescale)
+    if version == 1:
+        mvhd = struct.pack(">B3xQQIQ", 1, 0, 0, timescale, duration)
+    else:
+        mvhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, duration)
+    mvhd += bytes(80)  # rate, volume, matrix, next track id
+    return (
+        _mp4_box(b"ftyp", b"isom\0\0\2\0isomiso2avc1mp41")
+        + _mp4_box(b"mdat", bytes(padding))
+        + _mp4_box(b"moov", _mp4_box(b"mvhd", mvhd))
+    )
+
+
+def _ebml_element(element_id: bytes, payload: bytes) -> bytes:
+    size = bytes([0x80 | len(payload)]) if len(payload) < 0x7F else struct.pack(">H", 0x4000 | len(payload))
+    return element_id + size + payload
+
+
+def webm_file(seconds: float, padding: int = 64 * 1024) -> bytes:
+    """A minimal WebM: EBML header, then a Segment of unknown size with Info and one Cluster."""
+    header = _ebml_element(b"\x1a\x45\xdf\xa3", _ebml_element(b"\x42\x82", b"webm"))
+    info = _ebml_element(
+        b"\x15\x49\xa9\x66",
+        _ebml_element(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big"))
+        + _ebml_element(b"\x44\x89", struct.pack(">d", seconds * 1000)),
+    )
+    cluster = b"\x1f\x43\xb6\x75\x01\xff\xff\xff\xff\xff\xff\xff" + bytes(padding)
+    return header + b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff" + info + cluster
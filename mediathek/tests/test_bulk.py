@@ -0,0 +1,44 @@
+import json
+
+import synthetic
+from click.testing import CliRunner
+from conftest import INDEX_TEMPLATE, read_fixture
+
+import maus
+
+AZ_PATH = "/filme/sachgeschichten/a-bis-z.php5?filter=s"
+
+
+def run_bulk(url: str) -> str:
+    result = CliRunner().invoke(maus.cli, ["bulk", url, "--no-download"])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_bulk_no_download(http_server, maus_data):
+    url = http_server.add(AZ_PATH, read_fixture("a-bis-z.html"))
+    output = run_bulk(url)
+    assert "Gefunden: 9 verfügbar, 4 nicht verfügbar" in output
+    assert "4 neue Folgen zur Fehlt-Liste hinzugefügt" in output
+    # The journal is folded into the JSON files when the command finishes
+    assert not maus.JOURNAL_FILE.exists()
+    missing = json.loads(maus.MISSING_FILE.read_text())
+    assert [entry["title"] for entry in missing] == ["Sandburg", "Schreibmaschine", "Senf", "Strohhalm"]
+    assert "| Schreibmaschine" in maus.INDEX_FILE.read_text()
+
+    # Nothing new on the second run
+    assert "Keine neuen fehlenden Folgen" in run_bulk(url)
+
+
+def test_bench_bulk_no_download(benchmark, http_server, maus_data):
+    """Fetch, parse and store a 5,000-entry A-Z page and render index.md, starting from empty data files."""
+    url = http_server.add(AZ_PATH, synthetic.az_page(5000))
+
+    def reset():
+        for path in (maus.JSON_FILE, maus.MISSING_FILE, maus.JOURNAL_FILE):
+            path.unlink(missing_ok=True)
+        maus.INDEX_FILE.write_text(INDEX_TEMPLATE)
+        maus.INDEX_RENDERER = maus.IndexRenderer()
+
+    output = benchmark.pedantic(run_bulk, args=(url,), setup=reset, rounds=5)
+    assert "neue Folgen zur Fehlt-Liste hinzugefügt" in output
@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+from PIL import Image
+
+import maus
+
+
+def png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "orange").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_image_pipeline_survives_a_corrupt_hash_file(http_server, maus_data):
+    maus.IMAGE_HASH_FILE.write_text('{"schokolade-1992.webp": "ab')
+    url = http_server.add("/bilder/schokolade.png", png())
+    output_path = maus.SACHGESCHICHTEN_DIR / "schokolade-1992.webp"
+    pipeline = maus.ImagePipeline(variants={})
+    assert pipeline.submit(url, output_path).result()
+    assert list(json.loads(maus.IMAGE_HASH_FILE.read_text())) == [output_path.name]
+    # Unchanged on the second run, and no temporary file left behind
+    assert not maus.ImagePipeline(variants={}).submit(url, output_path).result()
+    assert not list(maus_data.glob(".*.tmp"))
+
+
+@pytest.mark.parametrize("cls, name", [
+    (maus.CrawlState, "CRAWL_STATE_FILE"),
+    (maus.SearchCache, "SEARCH_CACHE_FILE"),
+    (maus.FrameHashCache, "FRAME_HASH_FILE"),
+    (maus.ReencodeState, "REENCODE_STATE_FILE"),
+])
+@pytest.mark.parametrize("content", ['{"https://www.wdrmaus.de/": {"etag": "', "[]", ""])
+def test_corrupt_state_files_count_as_empty(maus_data, cls, name, content):
+    getattr(maus, name).write_text(content)
+    assert cls()._entries == {}
+
+
+def test_crawl_state_writes_atomically(http_server, maus_data):
+    url = http_server.add("/filme/sachgeschichten/a-bis-z.php5?filter=s", "<html></html>")
+    state = maus.CrawlState()
+    assert state.fetch_if_changed(url) == "<html></html>"
+    state.mark_done(url)
+    assert list(json.loads(maus.CRAWL_STATE_FILE.read_text())) == [url]
+    assert not list(maus_data.glob(".*.tmp"))
+    assert maus.CrawlState().fetch_if_changed(url) is None
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import maus
+
+
+def signature(*frame_hashes: int) -> int:
+    result = 0
+    for frame_hash in frame_hashes:
+        result = (result << 64) | frame_hash
+    return result
+
+
+def test_threshold_applies_per_frame():
+    base = [0x0123456789ABCDEF] * len(maus.DEDUPE_POSITIONS)
+    spread = [frame_hash ^ 0b11 for frame_hash in base]  # 2 bits in every frame, 10 in total
+    concentrated = [base[0] ^ 0x3FF] + base[1:]  # The same 10 bits, all in one frame
+    signatures = {
+        Path("a.mp4"): (signature(*base), 492.0),
+        Path("b.mp4"): (signature(*spread), 493.0),
+        Path("c.mp4"): (signature(*concentrated), 492.0),
+        Path("d.mp4"): (signature(*spread), 900.0),  # Same frames, different length
+    }
+    assert maus.max_frame_distance(signature(*base), signature(*concentrated)) == 10
+    assert maus.find_duplicate_groups(signatures, threshold=2) == [[Path("a.mp4"), Path("b.mp4")]]
+    assert maus.find_duplicate_groups(signatures, threshold=10) == [[Path("a.mp4"), Path("b.mp4"), Path("c.mp4")]]
@@ -0,0 +1,61 @@
+import json
+import random
+
+import pytest
+
+import lib
+
+SEGMENT = 64 * 1024
+VIDEO_PATH = "/medp/ondemand/weltweit/fsk0/123/1234567_12345678.mp4"
+
+
+@pytest.fixture
+def video(http_server):
+    body = random.Random(1).randbytes(5 * SEGMENT + 1000)
+    return http_server.add(VIDEO_PATH, body), body
+
+
+def segment_range(start: int, size: int) -> str:
+    return f"bytes={start}-{min(start + SEGMENT, size) - 1}"
+
+
+def test_download_direct(http_server, tmp_path, video):
+    url, body = video
+    output_path = tmp_path / "video.mp4"
+    assert lib.download_direct(url, output_path, segment_size=SEGMENT)
+    assert output_path.read_bytes() == body
+    assert len(http_server.ranges) == 6
+    assert list(tmp_path.iterdir()) == [output_path]
+
+
+def test_download_direct_resumes_from_sidecar(http_server, tmp_path, video):
+    url, body = video
+    output_path = tmp_path / "video.mp4"
+    part_path, progress_path = lib.download_part_paths(output_path, url)
+    # An interrupted run that finished the first and the fourth segment
+    done = [0, 3 * SEGMENT]
+    part = bytearray(len(body))
+    for start in done:
+        part[start:start + SEGMENT] = body[start:start + SEGMENT]
+    part_path.write_bytes(part)
+    progress_path.write_text(json.dumps({"url": url, "size": len(body), "segment_size": SEGMENT, "done": done}))
+
+    assert lib.download_direct(url, output_path, segment_size=SEGMENT)
+    assert output_path.read_bytes() == body
+    assert sorted(http_server.ranges) == sorted(
+        segment_range(start, len(body)) for start in range(0, len(body), SEGMENT) if start not in done
+    )
+    assert not part_path.exists() and not progress_path.exists()
+
+
+def test_download_direct_retries_only_failed_segments(http_server, tmp_path, monkeypatch, video):
+    monkeypatch.setattr(lib.time, "sleep", lambda seconds: None)
+    url, body = video
+    failed = {segment_range(SEGMENT, len(body)), segment_range(4 * SEGMENT, len(body))}
+    http_server.fail_ranges.update(failed)
+    output_path = tmp_path / "video.mp4"
+    assert lib.download_direct(url, output_path, segment_size=SEGMENT)
+    assert output_path.read_bytes() == body
+    # Six segments, and a second request for each failed one only
+    assert len(http_server.ranges) == 8
+    assert sorted(http_server.ranges[6:]) == sorted(failed)
@@ -0,0 +1,75 @@
+import shutil
+import subprocess
+
+import pytest
+import synthetic
+
+import lib
+
+
+@pytest.mark.parametrize("name, data", [
+    ("v0.mp4", synthetic.mp4_file(492.5)),
+    ("v1.mp4", synthetic.mp4_file(492.5, timescale=1000, version=1)),
+    ("episode.webm", synthetic.webm_file(492.5)),
+])
+def test_read_container_duration(tmp_path, name, data):
+    video_path = tmp_path / name
+    video_path.write_bytes(data)
+    assert lib.read_container_duration(video_path) == pytest.approx(492.5)
+
+
+@pytest.mark.parametrize("data", [b"", b"not a video", synthetic.mp4_file(10)[:200], synthetic.webm_file(10)[:40]])
+def test_unreadable_container_falls_back_to_ffprobe(tmp_path, monkeypatch, data):
+    video_path = tmp_path / "broken.mp4"
+    video_path.write_bytes(data)
+    assert lib.read_container_duration(video_path) is None
+    monkeypatch.setattr(lib, "ffprobe_video_duration_seconds", lambda path: 1.5)
+    assert lib.probe_video_duration_seconds(video_path) == 1.5
+
+
+@pytest.fixture
+def generated_videos(tmp_path):
+    """1,000 generated .mp4 and .webm files, like a sachgeschichten/ directory without the video data."""
+    mp4, webm = synthetic.mp4_file(492.5, padding=16 * 1024), synthetic.webm_file(492.5, padding=16 * 1024)
+    paths = []
+    for i in range(500):
+        for suffix, data in ((".mp4", mp4), (".webm", webm)):
+            path = tmp_path / f"episode-{i}{suffix}"
+            path.write_bytes(data)
+            paths.append(path)
+    return paths
+
+
+def test_bench_read_container_duration(benchmark, generated_videos):
+    durations = benchmark(lambda: [lib.read_container_duration(path) for path in generated_videos])
+    assert set(durations) == {492.5}
+
+
+@pytest.fixture
+def encoded_videos(tmp_path):
+    """20 copies of a short clip encoded by ffmpeg, which ffprobe can read as well."""
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        pytest.skip("ffmpeg/ffprobe not installed")
+    clip = tmp_path / "clip.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=3:size=160x90:rate=25", str(clip)],
+        check=True,
+    )
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"episode-{i}.mp4"
+        shutil.copyfile(clip, path)
+        paths.append(path)
+    return paths
+
+
+def test_bench_encoded_container_duration(benchmark, encoded_videos):
+    durations = benchmark(lambda: [lib.read_container_duration(path) for path in encoded_videos])
+    assert durations[0] == pytest.approx(lib.ffprobe_video_duration_seconds(encoded_videos[0]), abs=0.05)
+
+
+def test_bench_encoded_ffprobe(benchmark, encoded_videos):
+    durations = benchmark.pedantic(
+        lambda: [lib.ffprobe_video_duration_seconds(path) for path in encoded_videos], rounds=3
+    )
+    assert None not in durations
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+import synthetic
+from click.testing import CliRunner
+
+import maus
+
+
+def nested_scan(paths: list[Path], stem: str) -> Path | None:
+    """cleanup's lookup before FileNameIndex: normalize every file for every episode."""
+    expected = maus.normalize_for_comparison(stem)
+    for path in paths:
+        if maus.normalize_for_comparison(path.stem) == expected:
+            return path
+    return None
+
+
+def old_scheme_name(title: str, year: str) -> str:
+    """File name from before slugs, e.g. Schüler-2010."""
+    return f"{title.replace(' ', '-')}-{year}"
+
+
+def test_file_name_index(tmp_path):
+    paths = [tmp_path / name for name in ("Schüler-2010.webm", "Schüler-2010.mp4", "kaese-(2001).mp4", "bagger-1999.mp4")]
+    index = maus.FileNameIndex(paths)
+    assert index.exact("schueler-2010") == [paths[1], paths[0]]
+    assert index.exact("kaese-2001") == [paths[2]]
+    assert index.exact("kran-2001") == []
+    assert [path for _, path in index.similar("baggern-1999")] == [paths[3]]
+    assert index.similar("honig-1987") == []
+
+
+@pytest.fixture
+def video_files(tmp_path):
+    """5,000 file names: current slugs, old-scheme names and strays."""
+    names = []
+    for i, (title, year) in enumerate(synthetic.episode_titles(5000)):
+        if i % 5 == 0:
+            names.append(old_scheme_name(title, year) + ".webm")
+        elif i % 5 == 1:
+            names.append(f"unbekannt-{i}.mp4")
+        else:
+            names.append(maus.get_slug(title, year) + ".mp4")
+    return [tmp_path / name for name in names]
+
+
+def test_bench_file_name_index(benchmark, video_files):
+    """Build the index once and look up every episode, like one cleanup run."""
+    stems = [maus.get_slug(title, year) for title, year in synthetic.episode_titles(5000)]
+
+    def run():
+        index = maus.FileNameIndex(video_files)
+        return [index.exact(stem)[:1] for stem in stems]
+
+    assert sum(1 for found in benchmark(run) if found) == 4000
+
+
+def test_cleanup_apply_counts_failed_conversions(maus_data, monkeypatch):
+    catalog = synthetic.catalog(4)
+    maus.JSON_FILE.write_text(json.dumps(catalog, ensure_ascii=False))
+    for entry in catalog[:3]:
+        (maus.SACHGESCHICHTEN_DIR / (old_scheme_name(entry["name"], entry["originalYear"]) + ".mp4")).touch()
+    (maus.SACHGESCHICHTEN_DIR / (old_scheme_name(catalog[3]["name"], catalog[3]["originalYear"]) + ".webm")).touch()
+
+    def convert_to_mp4(source, target):
+        raise OSError("ffmpeg failed")
+
+    monkeypatch.setattr(maus, "convert_to_mp4", convert_to_mp4)
+    result = CliRunner().invoke(maus.cli, ["cleanup", "--apply"])
+    assert result.exit_code == 0, result.output
+    assert "3 Dateien umbenannt, 0 konvertiert" in result.output
+    assert "1 Konvertierungen fehlgeschlagen" in result.output
+
+
+def test_bench_nested_scan(benchmark, video_files):
+    """The previous nested scan, for 50 of the 5,000 episodes."""
+    stems = [maus.get_slug(title, year) for title, year in synthetic.episode_titles(5000)[-50:]]
+    benchmark.pedantic(lambda: [nested_scan(video_files, stem) for stem in stems], rounds=3)
+
+
+def test_bench_cleanup_preview(benchmark, maus_data):
+    """maus.py cleanup without --apply over 3,000 episodes, 600 of them under old-scheme names."""
+    catalog = synthetic.catalog(3000)
+    maus.JSON_FILE.write_text(json.dumps(catalog, ensure_ascii=False))
+    for i, entry in enumerate(catalog):
+        if i % 5 == 0:
+            name = old_scheme_name(entry["name"], entry["originalYear"]) + ".mp4"
+        else:
+            name = maus.get_slug(entry["name"], entry["originalYear"]) + ".mp4"
+        (maus.SACHGESCHICHTEN_DIR / name).touch()
+
+    def run():
+        result = CliRunner().invoke(maus.cli, ["cleanup"])
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    assert "600 Dateien zum Umbenennen gefunden" in benchmark.pedantic(run, rounds=5)
@@ -0,0 +1,96 @@
+import json
+import random
+
+import pytest
+import synthetic
+from conftest import FIXTURES
+
+import maus
+
+CORPUS = sorted((FIXTURES / "json-ld").glob("*.txt"))
+
+
+def quadratic_fix_malformed_json(json_str: str) -> str:
+    """fix_malformed_json before the single-pass rewrite, copies the rest of the string at every closing quote."""
+    result = []
+    in_string = False
+    i = 0
+    n = len(json_str)
+    while i < n:
+        char = json_str[i]
+        if char == '\\' and i + 1 < n:
+            result.append(char)
+            result.append(json_str[i + 1])
+            i += 2
+            continue
+        if char == '"':
+            if not in_string:
+                in_string = True
+                result.append(char)
+            else:
+                rest = json_str[i + 1:].lstrip()
+                if not rest or rest[0] in ',}]:':
+                    in_string = False
+                    result.append(char)
+                else:
+                    result.append('\\"')
+        else:
+            result.append(char)
+        i += 1
+    return ''.join(result)
+
+
+@pytest.mark.parametrize("snippet", CORPUS, ids=lambda path: path.stem)
+def test_json_ld_corpus(snippet):
+    """Malformed JSON-LD as seen on WDR pages, with the expected parse next to it.
+
+    Snippets without an expected .json are known limitations: an inner quote
+    followed by , or : looks exactly like the end of the string.
+    """
+    text = snippet.read_text()
+    expected = snippet.with_suffix(".json")
+    if not expected.exists():
+        with pytest.raises(json.JSONDecodeError):
+            maus.parse_json_ld(text)
+        return
+    assert maus.parse_json_ld(text) == json.loads(expected.read_text())
+    assert maus.fix_malformed_json(text) == quadratic_fix_malformed_json(text)
+
+
+def random_text(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(0, 12)):
+        word = rng.choice(synthetic.WORDS + ["Maus", "über", "„Ente“", "3,5", "a:b", "[x]", "{y}"])
+        if rng.random() < 0.3:
+            word = f'"{word}"'
+        words.append(word)
+    return rng.choice(["", " ", "\n", "\t"]).join(words)
+
+
+def test_json_ld_fuzz():
+    """Random JSON-LD whose inner quotes lost their backslashes parses back to the original."""
+    rng = random.Random(6)
+    for _ in range(2000):
+        metadata = {
+            "@type": "VideoObject",
+            "name": random_text(rng),
+            "description": random_text(rng),
+            "keywords": [random_text(rng) for _ in range(rng.randint(0, 3))],
+            "image": {"url": "https://www.wdrmaus.de/bilder/x.jpg", "caption": random_text(rng)},
+        }
+        malformed = json.dumps(metadata, ensure_ascii=False, indent=rng.choice([None, 2])).replace('\\"', '"')
+        assert maus.parse_json_ld(malformed) == metadata, malformed
+        assert maus.fix_malformed_json(malformed) == quadratic_fix_malformed_json(malformed)
+
+
+@pytest.fixture
+def long_json_ld():
+    return maus.JSON_LD_PATTERN.search(synthetic.episode_page(description_quotes=2000)).group(1)
+
+
+def test_bench_fix_malformed_json(benchmark, long_json_ld):
+    json.loads(benchmark(maus.fix_malformed_json, long_json_ld))
+
+
+def test_bench_fix_malformed_json_quadratic(benchmark, long_json_ld):
+    json.loads(benchmark.pedantic(quadratic_fix_malformed_json, args=(long_json_ld,), rounds=3))
@@ -0,0 +1,111 @@
+import json
+from urllib.parse import urljoin
+
+import pytest
+import synthetic
+from conftest import FIXTURES, read_fixture
+
+import maus
+import tatort
+
+AZ_URL = "https://www.wdrmaus.de/filme/sachgeschichten/a-bis-z.php5?filter=s"
+
+
+def test_parse_bulk_html_fixture():
+    available, missing = maus.parse_bulk_html(read_fixture("a-bis-z.html"), AZ_URL)
+    assert len(available) == 9
+    assert available[2] == {
+        "title": "Schokolade", "year": "1992", "url": "https://www.wdrmaus.de/filme/sachgeschichten/schokolade.php5",
+    }
+    assert available[6]["url"] == "https://www.wdrmaus.de/extras/mausthemen/weltraum/sternwarte.php5"
+    assert missing == [
+        {"title": "Sandburg", "year": "1978"},
+        {"title": "Schreibmaschine", "year": "1975"},
+        {"title": "Senf", "year": "1981"},
+        {"title": "Strohhalm", "year": "1983"},
+    ]
+
+
+@pytest.mark.parametrize("href", [
+    "https://h", "https://h/a/b.php5", "//h", "//h/x", "/x/y.php5", "x.php5", "a/b.php5", "../a/b.php5",
+    "./a/", "a/./b", "a/..", "a/b?x=1/2", "a/b#f/g", "?x=1", "a:b/c", "../../../x/y", "a//b",
+    "a/\tb.php5", "a/b.php5\n", " a/b.php5",
+])
+def test_parse_bulk_html_resolves_like_urljoin(href):
+    html = f'<li><a class="intern" href="{href}"><span class="abiszTitel">T <span class="abiszJahr">(2020)</span></span></a></li>'
+    available, _ = maus.parse_bulk_html(html, AZ_URL)
+    assert available[0]["url"] == urljoin(AZ_URL, href)
+
+
+def test_parse_filter_html_fixture():
+    urls = maus.parse_filter_html(read_fixture("a-bis-z.html"), AZ_URL)
+    assert len(urls) == 25
+    assert urls[0] == "https://www.wdrmaus.de/filme/sachgeschichten/a-bis-z.php5?filter=a"
+    assert urls[-1] == "https://www.wdrmaus.de/filme/sachgeschichten/a-bis-z.php5?filter=0-9"
+
+
+def test_parse_metadata_html_fixture():
+    metadata = maus.parse_metadata_html(read_fixture("sachgeschichte.html"))
+    assert metadata == json.loads((FIXTURES / "sachgeschichte.json").read_text())
+    episode = maus.Episode.from_metadata(metadata)
+    assert (episode.slug, episode.image_url) == (
+        "schuelerzeitung-2010", "https://www.wdrmaus.de/filme/sachgeschichten/bilder/schueler_zeitung.jpg",
+    )
+
+
+@pytest.mark.parametrize("title, year, slug", [
+    ("Schülerzeitung", "2010", "schuelerzeitung-2010"),
+    ("Straße – Bau", "1998", "strasse-bau-1998"),
+    ("Wie kommt das Loch in den Käse?", "", "wie-kommt-das-loch-in-den-kaese"),
+    ("Maus' Geburtstag · Teil 2", "2021", "maus-geburtstag-teil-2-2021"),
+])
+def test_get_slug(title, year, slug):
+    assert maus.get_slug(title, year) == slug
+
+
+@pytest.mark.parametrize("title, normalized", [
+    ("Tatort: Borowski und der Engel (S2023/E05) – ARD Mediathek", "Borowski und der Engel"),
+    ("Wunschtatort Im Schmerz geboren", "Im Schmerz geboren"),
+    ("Tatort Konstanz: Rabenherz", "Rabenherz"),
+])
+def test_tatort_normalize_title(title, normalized):
+    assert tatort.normalize_title(title) == normalized
+    assert tatort.slugify(normalized) == normalized.lower().replace(" ", "-")
+
+
+def test_bench_parse_bulk_html(benchmark):
+    html = synthetic.az_page(5000)
+    available, missing = benchmark(maus.parse_bulk_html, html, AZ_URL)
+    assert len(available) + len(missing) == 5000
+
+
+def test_bench_parse_filter_html(benchmark):
+    html = synthetic.az_page(5000)
+    assert len(benchmark(maus.parse_filter_html, html, AZ_URL)) == 23
+
+
+def test_bench_parse_metadata_html(benchmark):
+    html = synthetic.episode_page()
+    assert benchmark(maus.parse_metadata_html, html)["name"] == "Schülerzeitung"
+
+
+def test_bench_get_slug(benchmark):
+    # The uncached function, get_slug itself memoizes per (title, year)
+    titles = synthetic.episode_titles(5000)
+    benchmark(lambda: [maus.get_slug.__wrapped__(title, year) for title, year in titles])
+
+
+def test_bench_index_table(benchmark):
+    rows = {maus.get_slug(title, year): (title, year, "Armin", "8:12") for title, year in synthetic.episode_titles(5000)}
+
+    def build():
+        table = maus.IndexTable(["Titel", "Jahr", "Autor", "Dauer"])
+        table.update(rows)
+        return table.text()
+
+    assert benchmark(build).count("\n") == 5001
+
+
+def test_bench_tatort_titles(benchmark):
+    titles = [f"Tatort: {title} ({year}) – ARD Mediathek" for title, year in synthetic.episode_titles(5000)]
+    benchmark(lambda: [tatort.slugify(tatort.normalize_title(title)) for title in titles])
@@ -0,0 +1,39 @@
+import shutil
+import subprocess
+from collections import namedtuple
+
+import pytest
+
+import maus
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+
+@pytest.fixture
+def video_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(maus, "probe_codecs", lambda path: ["h264", "aac"])
+    video_path = tmp_path / "schokolade-1992.mp4"
+    video_path.write_bytes(bytes(1024))
+    return video_path
+
+
+def test_reencode_skips_files_that_dont_fit(video_path, monkeypatch):
+    def run(*args, **kwargs):
+        pytest.fail("ffmpeg started")
+
+    monkeypatch.setattr(maus.subprocess, "run", run)
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 1024 + maus.REENCODE_FREE_MARGIN - 1))
+    assert maus.reencode_video(video_path, 492.0) == "no-space"
+    assert video_path.read_bytes() == bytes(1024)
+
+
+def test_reencode_releases_its_reservation(video_path, monkeypatch):
+    def run(args, **kwargs):
+        assert maus._reencode_reserved == 1024
+        raise subprocess.CalledProcessError(1, args)
+
+    monkeypatch.setattr(maus.subprocess, "run", run)
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 1024 + maus.REENCODE_FREE_MARGIN))
+    with pytest.raises(subprocess.CalledProcessError):
+        maus.reencode_video(video_path, 492.0)
+    assert maus._reencode_reserved == 0
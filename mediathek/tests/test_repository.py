@@ -0,0 +1,61 @@
+import json
+
+import pytest
+import synthetic
+
+import maus
+
+
+@pytest.fixture
+def catalog(maus_data):
+    entries = synthetic.catalog(10_000)
+    maus.JSON_FILE.write_text(json.dumps(entries, ensure_ascii=False))
+    return entries
+
+
+def linear_get_by_url(repo: maus.EpisodeRepository, url: str) -> maus.Episode | None:
+    """get_by_url before the URL index: normalize and compare against every downloaded episode."""
+    normalized = repo._normalize_url(url)
+    for ep in repo._downloaded.values():
+        if repo._normalize_url(ep.url) == normalized or repo._normalize_url(ep.alt_url) == normalized:
+            return ep
+    return None
+
+
+def test_get_by_url_index(catalog):
+    repo = maus.EpisodeRepository()
+    first = repo.get_by_url(catalog[0]["url"])
+    assert first.title == catalog[0]["name"]
+    assert repo.get_by_url(catalog[0]["@id"]) is first
+    assert repo.get_by_url(catalog[0]["url"].upper() + "/") is first
+    assert repo.get_by_url("https://www.wdrmaus.de/filme/sachgeschichten/unbekannt.php5") is None
+
+    # A missing episode that gets downloaded is found by the URL set in between
+    missing = maus.Episode(title="Senf", year="1981")
+    repo.add_to_missing(missing)
+    downloaded = maus.Episode(title="Senf", year="1981")
+    repo.upsert_downloaded(downloaded)
+    downloaded.url = "https://www.wdrmaus.de/filme/sachgeschichten/senf.php5"
+    repo.remove_from_missing(downloaded.slug)
+    assert repo.get_by_url("https://www.wdrmaus.de//filme/sachgeschichten/senf.php5") is downloaded
+
+    repo.remove_from_downloaded(first.slug)
+    assert repo.get_by_url(catalog[0]["url"]) is None
+    repo.reload()
+    assert repo.get_by_url(catalog[0]["url"]).title == catalog[0]["name"]
+
+
+def test_bench_get_by_url(benchmark, catalog):
+    """One lookup per A-Z entry, as the presenter collection in process_bulk_url does."""
+    repo = maus.EpisodeRepository()
+    urls = [entry["url"] for entry in catalog]
+    found = benchmark(lambda: [repo.get_by_url(url) for url in urls])
+    assert None not in found
+
+
+def test_bench_get_by_url_linear(benchmark, catalog):
+    """The same lookups with the old linear scan, for 100 of the 10,000 URLs."""
+    repo = maus.EpisodeRepository()
+    urls = [entry["url"] for entry in catalog[-100:]]
+    found = benchmark.pedantic(lambda: [linear_get_by_url(repo, url) for url in urls], rounds=3)
+    assert None not in found
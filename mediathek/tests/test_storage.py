@@ -0,0 +1,145 @@
+import json
+
+import pytest
+import synthetic
+
+import maus
+
+
+@pytest.fixture
+def catalog(maus_data):
+    entries = synthetic.catalog(1000)
+    maus.JSON_FILE.write_text(json.dumps(entries, ensure_ascii=False))
+    return entries
+
+
+def journal() -> list[dict]:
+    if not maus.JOURNAL_FILE.exists():
+        return []
+    return [json.loads(line) for line in maus.JOURNAL_FILE.read_text().splitlines()]
+
+
+def test_save_journals_only_dirty_episodes(catalog):
+    repo = maus.EpisodeRepository()
+    first, second = repo.get_all_downloaded()[:2]
+    first.presenter = "Clarissa"
+    repo.mark_dirty(first.slug)
+    repo.add_to_missing(maus.Episode(title="Senf", year="1981"))
+    repo.remove_from_downloaded(second.slug)
+    repo.save()
+    assert [(record["op"], record["list"], record["slug"]) for record in journal()] == sorted([
+        ("upsert", "downloaded", first.slug),
+        ("upsert", "missing", "senf-1981"),
+        ("delete", "downloaded", second.slug),
+    ], key=lambda record: record[2])
+
+    # Nothing dirty, nothing written
+    repo.save()
+    assert len(journal()) == 3
+
+    reloaded = maus.EpisodeRepository()
+    assert reloaded.get_by_slug(first.slug).presenter == "Clarissa"
+    assert reloaded.get_by_slug(second.slug) is None
+    assert reloaded.get_by_slug("senf-1981").title == "Senf"
+
+
+def test_merging_without_changes_is_not_dirty(catalog):
+    repo = maus.EpisodeRepository()
+    repo.add_to_missing(maus.Episode(title="Senf", year="1981", presenter="Armin"))
+    repo.save()
+    repo.add_to_missing(maus.Episode(title="Senf", year="1981"))
+    repo.save()
+    assert len(journal()) == 1
+
+
+def test_compact_writes_the_files(catalog):
+    repo = maus.EpisodeRepository()
+    for i in range(maus.JOURNAL_COMPACT_EVERY + 5):
+        repo.add_to_missing(maus.Episode(title=f"Fehlt {i}", year="1990"))
+        repo.save()
+    # The journal was folded into the files once it got too long
+    assert 0 < len(journal()) < maus.JOURNAL_COMPACT_EVERY
+    repo.compact()
+    assert not maus.JOURNAL_FILE.exists()
+    assert len(json.loads(maus.MISSING_FILE.read_text())) == maus.JOURNAL_COMPACT_EVERY + 5
+    assert len(json.loads(maus.JSON_FILE.read_text())) == len(catalog)
+
+
+@pytest.fixture
+def sqlite_catalog(catalog):
+    maus.EpisodeRepository(maus.JsonStorage()).save_to(maus.SqliteStorage())
+    return catalog
+
+
+def test_sqlite_save_writes_only_dirty_rows(sqlite_catalog):
+    repo = maus.EpisodeRepository()
+    assert isinstance(repo.storage, maus.SqliteStorage)
+    first, second = repo.get_all_downloaded()[:2]
+    first.presenter = "Clarissa"
+    repo.mark_dirty(first.slug)
+    repo.remove_from_downloaded(second.slug)
+    # Added by another process in the meantime, must survive the save
+    other = maus.EpisodeRepository()
+    other.add_to_missing(maus.Episode(title="Senf", year="1981"))
+    other.save()
+
+    changes = repo.storage.conn.total_changes
+    repo.save()
+    assert repo.storage.conn.total_changes - changes == 2
+
+    reloaded = maus.EpisodeRepository()
+    assert reloaded.get_by_slug(first.slug).presenter == "Clarissa"
+    assert reloaded.get_by_slug(second.slug) is None
+    assert reloaded.get_by_slug("senf-1981").title == "Senf"
+    assert len(reloaded.get_all_downloaded()) == len(sqlite_catalog) - 1
+
+
+def test_replay_applies_the_journal(catalog):
+    repo = maus.EpisodeRepository()
+    repo.add_to_missing(maus.Episode(title="Senf", year="1981"))
+    repo.remove_from_downloaded(repo.get_all_downloaded()[0].slug)
+    repo.save()
+    reloaded = maus.EpisodeRepository()
+    assert reloaded.get_by_slug("senf-1981") is not None
+    assert len(reloaded.get_all_downloaded()) == len(catalog) - 1
+
+
+@pytest.mark.parametrize("tail", [
+    b'{"op": "upsert", "list": "missing", "slug": "strohhalm-1983", "da',
+    b'{"op": "upsert", "list": "missing", "slug": "strohhalm-1983"}\n',
+    b'{"op": "upsert", "list": "gibtsnicht", "slug": "strohhalm-1983", "data": {}}\n',
+    b'{"op": "rename", "list": "missing", "slug": "strohhalm-1983"}\n',
+    b'{"list": "missing", "slug": "strohhalm-1983"}\n',
+    b'[1, 2, 3]\n',
+    b'\xff\n',
+])
+def test_replay_truncates_a_broken_tail(catalog, tail):
+    repo = maus.EpisodeRepository()
+    repo.add_to_missing(maus.Episode(title="Senf", year="1981"))
+    repo.save()
+    valid = maus.JOURNAL_FILE.read_bytes()
+    with maus.JOURNAL_FILE.open("ab") as f:
+        f.write(tail + b'{"op": "delete", "list": "missing", "slug": "senf-1981"}\n')
+
+    reloaded = maus.EpisodeRepository()
+    assert reloaded.get_by_slug("senf-1981") is not None
+    assert reloaded.get_by_slug("strohhalm-1983") is None
+    # Everything from the broken line on is cut off, so new entries start on a fresh line
+    assert maus.JOURNAL_FILE.read_bytes() == valid
+    reloaded.add_to_missing(maus.Episode(title="Strohhalm", year="1983"))
+    reloaded.save()
+    assert maus.EpisodeRepository().get_by_slug("strohhalm-1983") is not None
+
+
+def test_bench_save_one_episode(benchmark, catalog):
+    """One changed episode in a 1,000-episode catalog, as after each bulk download."""
+    repo = maus.EpisodeRepository()
+    episodes = iter(repo.get_all_downloaded())
+
+    def save():
+        episode = next(episodes)
+        episode.presenter = "Clarissa"
+        repo.mark_dirty(episode.slug)
+        repo.save()
+
+    benchmark.pedantic(save, rounds=500)
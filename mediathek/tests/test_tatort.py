@@ -0,0 +1,26 @@
+import synthetic
+
+import tatort
+
+TITLES = [
+    "Im Schmerz geboren", "Im Schmerz", "Im Schmerz geboren", "Straße der Angst", "Strasse der Angst",
+    "Straße", "Der Fluch des Geldes", "Der", "", "Borowski und der Engel", "Borowski und der Engel",
+]
+
+
+def linear_prefix_matches(episodes: list[dict], slug: str) -> list[dict]:
+    """find_by_slug_prefix before SlugIndex: compare against every episode."""
+    return [entry for entry in episodes if entry["slug"].startswith(slug) or slug.startswith(entry["slug"])]
+
+
+def test_slug_index_matches_linear_scan():
+    episodes = [{"titel": title, "slug": tatort.slugify(title)} for title in TITLES]
+    episodes += [{"titel": title, "slug": tatort.slugify(title)} for title, _ in synthetic.episode_titles(200)]
+    index = tatort.SlugIndex(episodes)
+    queries = {entry["slug"] for entry in episodes} | {
+        "", "im", "im-schmerz-geboren-2", "stra", "straße", "strasse", "strasse-der-angst", "der-", "x",
+    }
+    for slug in sorted(queries):
+        # The same entries in the same order, duplicates included
+        expected = [id(entry) for entry in linear_prefix_matches(episodes, slug)]
+        assert [id(entry) for entry in index.prefix_matches(slug)] == expected, slug
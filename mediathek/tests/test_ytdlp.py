@@ -0,0 +1,41 @@
+import itertools
+import shutil
+
+import pytest
+import synthetic
+
+import lib
+
+EPISODES = 5  # Downloads per benchmark round
+
+
+@pytest.fixture
+def video_url(http_server):
+    return http_server.add("/medp/ondemand/weltweit/fsk0/123/1234567_12345678.mp4", synthetic.mp4_file(492.5))
+
+
+def download_episodes(url: str, directory, counter) -> list:
+    """Download the same video EPISODES times to fresh paths, like a bulk run."""
+    paths = []
+    for _ in range(EPISODES):
+        output_path = directory / f"episode-{next(counter)}.mp4"
+        lib.ytdlp_download(url, output_path)
+        paths.append(output_path)
+    return paths
+
+
+def test_bench_ytdlp_subprocess(benchmark, monkeypatch, tmp_path, video_url):
+    """One yt-dlp process per episode: Python start-up and extractor import every time."""
+    if not shutil.which("yt-dlp"):
+        pytest.skip("yt-dlp not installed")
+    monkeypatch.setattr(lib, "YTDLP_MODE", "subprocess")
+    paths = benchmark.pedantic(download_episodes, args=(video_url, tmp_path, itertools.count()), rounds=3)
+    assert all(path.stat().st_size == len(synthetic.mp4_file(492.5)) for path in paths)
+
+
+def test_bench_ytdlp_in_process(benchmark, monkeypatch, tmp_path, video_url):
+    """One shared yt_dlp.YoutubeDL for all episodes; the first round pays for the import."""
+    pytest.importorskip("yt_dlp")
+    monkeypatch.setattr(lib, "YTDLP_MODE", "inprocess")
+    paths = benchmark.pedantic(download_episodes, args=(video_url, tmp_path, itertools.count()), rounds=3)
+    assert all(path.stat().st_size == len(synthetic.mp4_file(492.5)) for path in paths)